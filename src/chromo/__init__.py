@@ -1,6 +1,7 @@
 from chromo import models
 from chromo import kinematics
 from chromo import constants
+from chromo import parallel
 
 import os
 from importlib.metadata import version
@@ -9,4 +10,11 @@ __version__ = version("chromo")
 
 debug_level = int(os.environ.get("DEBUG", "0"))
 
-__all__ = ["models", "kinematics", "constants", "debug_level", "__version__"]
+__all__ = [
+    "models",
+    "kinematics",
+    "constants",
+    "parallel",
+    "debug_level",
+    "__version__",
+]
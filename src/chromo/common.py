@@ -14,6 +14,7 @@ import importlib
 import warnings
 from abc import ABC, abstractmethod
 from contextlib import contextmanager
+from types import SimpleNamespace
 from typing import Optional, Tuple
 
 import numpy as np
@@ -26,12 +27,19 @@ from chromo.constants import (
     quarks_and_diquarks_and_gluons,
     standard_projectiles,
 )
+from chromo.decay import NumpyDecayHandler
 from chromo.decay_handler import Pythia8DecayHandler
-from chromo.kinematics import CompositeTarget, EventKinematicsBase
+from chromo.kinematics import (
+    CompositeTarget,
+    EventKinematicsBase,
+    EventKinematicsWithRestframe,
+)
 from chromo.util import (
     Nuclei,
+    _cross_section_key,
     classproperty,
     naneq,
+    pdg2charge,
     pdg2name,
     select_long_lived,
     select_mothers,
@@ -192,6 +200,12 @@ class EventData:
         available for filtered events. In those cases, mothers is None.
     daughters: 2D array of int or None
         Same as mothers.
+
+    Derived quantities like :attr:`pt` or :attr:`eta` are computed on first
+    access and cached, each access returns a new copy. The cache is cleared
+    when one of the arrays px, py, pz, en, m or the kinematics are replaced,
+    or when the event is boosted with :meth:`EventKinematicsBase.apply_boost`.
+    Call :meth:`clear_cache` after modifying these arrays in place otherwise.
     """
 
     generator: Tuple[str, str]
@@ -276,6 +290,21 @@ class EventData:
         for f, v in zip(dataclasses.fields(self), state):
             setattr(self, f.name, v)
 
+    def __reduce_ex__(self, protocol):
+        if protocol < 5:
+            return super().__reduce_ex__(protocol)
+        # With protocol 5 (PEP 574), the arrays are not copied here. Contiguous
+        # arrays are handed to the buffer_callback of the pickler as out-of-band
+        # buffers. The kinematics are pickled by reference, so events in the
+        # same pickle stream share them.
+        state = []
+        for f in dataclasses.fields(EventData):
+            x = getattr(self, f.name)
+            if isinstance(x, np.ndarray):
+                x = np.ascontiguousarray(x)
+            state.append(x)
+        return (EventData, tuple(state))
+
     def copy(self):
         """
         Return event copy.
@@ -360,69 +389,141 @@ class EventData:
     @property
     def pt(self):
         """Return transverse momentum in GeV/c."""
-        return np.sqrt(self.pt2)
+        return self.compute(("pt",))[0]
 
     @property
     def pt2(self):
         """Return transverse momentum squared in (GeV/c)**2."""
-        return self.px**2 + self.py**2
+        return self.compute(("pt2",))[0]
 
     @property
     def p_tot(self):
         """Return total momentum in GeV/c."""
-        return np.sqrt(self.pt2 + self.pz**2)
+        return self.compute(("p_tot",))[0]
 
     @property
     def eta(self):
         """Return pseudorapidity."""
-        with np.errstate(divide="ignore", invalid="ignore"):
-            return np.log((self.p_tot + self.pz) / self.pt)
+        return self.compute(("eta",))[0]
 
     @property
     def y(self):
         """Return rapidity."""
-        with np.errstate(divide="ignore", invalid="ignore"):
-            return 0.5 * np.log((self.en + self.pz) / (self.en - self.pz))
+        return self.compute(("y",))[0]
 
     @property
     def xf(self):
         """Return Feynman x_F."""
-        return 2.0 * self.pz / self.kin.ecm
+        return self.compute(("xf",))[0]
 
     @property
     def theta(self):
         """Return angle to beam axis (z-axis) in rad."""
-        return np.arctan2(self.pt, self.pz)
+        return self.compute(("theta",))[0]
 
     @property
     def phi(self):
         """Return polar angle around beam axis (z-axis) in rad."""
-        return np.arctan2(self.py, self.px)
+        return self.compute(("phi",))[0]
 
     @property
     def elab(self):
         """Return kinetic energy in laboratory frame."""
-        from chromo.util import EventFrame
-
-        kin = self.kin
-        if kin.frame == EventFrame.FIXED_TARGET:
-            return self.en
-        return kin._gamma_cm * self.en + kin._betagamma_cm * self.pz
+        return self.compute(("elab",))[0]
 
     @property
     def ekin(self):
         """Return kinetic energy in current frame."""
-        return self.elab - self.m
+        return self.compute(("ekin",))[0]
 
     @property
     def xlab(self):
         """Return energy fraction of beam in laboratory frame."""
-        return self.elab / self.kin.elab
+        return self.compute(("xlab",))[0]
 
     @property
     def fw(self):
         """Quantity needed for invariant cross section histograms."""
-        return self.en / self.kin.pcm
+        return self.compute(("fw",))[0]
+
+    def compute(self, names, dtype=None):
+        """
+        Return several derived quantities at once.
+
+        The quantities are computed in a single pass, in which intermediate
+        results (e.g. the transverse momentum, which is needed for pt, eta and
+        theta) are computed only once. All results are cached.
+
+        Parameters
+        ----------
+        names : sequence of str
+            Names of derived quantities, e.g. ``["pt", "eta", "y", "phi"]``.
+        dtype : numpy.dtype, optional
+            If set, the results are converted to this type, e.g. np.float32 to
+            reduce the memory footprint of histogramming.
+
+        Returns
+        -------
+        tuple of arrays
+            Copies of the quantities in the order of names.
+        """
+        for name in names:
+            if name not in _derived_requires:
+                raise ValueError(f"{name!r} is not a derived quantity")
+
+        key = (self.px, self.py, self.pz, self.en, self.m, self.kin)
+        memo = self.__dict__.get("_derived")
+        if memo is None or not all(a is b for a, b in zip(memo[0], key)):
+            memo = self.__dict__["_derived"] = (key, {})
+        c = memo[1]
+
+        # missing quantities and the intermediates they require
+        todo = set()
+        stack = [name for name in names if name not in c]
+        while stack:
+            name = stack.pop()
+            if name not in todo and name not in c:
+                todo.add(name)
+                stack += _derived_requires[name]
+
+        if todo:
+            px, py, pz, en, kin = self.px, self.py, self.pz, self.en, self.kin
+            with np.errstate(divide="ignore", invalid="ignore"):
+                if "pt2" in todo:
+                    c["pt2"] = px**2 + py**2
+                if "pt" in todo:
+                    c["pt"] = np.sqrt(c["pt2"])
+                if "p_tot" in todo:
+                    c["p_tot"] = np.sqrt(c["pt2"] + pz**2)
+                if "eta" in todo:
+                    c["eta"] = np.log((c["p_tot"] + pz) / c["pt"])
+                if "y" in todo:
+                    c["y"] = 0.5 * np.log((en + pz) / (en - pz))
+                if "xf" in todo:
+                    c["xf"] = 2.0 * pz / kin.ecm
+                if "theta" in todo:
+                    c["theta"] = np.arctan2(c["pt"], pz)
+                if "phi" in todo:
+                    c["phi"] = np.arctan2(py, px)
+                if "elab" in todo:
+                    from chromo.util import EventFrame
+
+                    if kin.frame == EventFrame.FIXED_TARGET:
+                        c["elab"] = en
+                    else:
+                        c["elab"] = kin._gamma_cm * en + kin._betagamma_cm * pz
+                if "ekin" in todo:
+                    c["ekin"] = c["elab"] - self.m
+                if "xlab" in todo:
+                    c["xlab"] = c["elab"] / kin.elab
+                if "fw" in todo:
+                    c["fw"] = en / kin.pcm
+
+        return tuple(np.array(c[name], dtype=dtype) for name in names)
+
+    def clear_cache(self):
+        """Clear cached derived quantities."""
+        self.__dict__.pop("_derived", None)
 
     def _prepare_for_hepmc(self):
         """
@@ -499,6 +600,401 @@ class EventData:
         pass
 
 
+# derived quantities of EventData and the intermediates they require
+_derived_requires = {
+    "pt2": (),
+    "pt": ("pt2",),
+    "p_tot": ("pt2",),
+    "eta": ("pt", "p_tot"),
+    "y": (),
+    "xf": (),
+    "theta": ("pt",),
+    "phi": (),
+    "elab": (),
+    "ekin": ("elab",),
+    "xlab": ("elab",),
+    "fw": (),
+}
+
+
+@dataclasses.dataclass
+class EventBatch:
+    """
+    Columnar storage of many events.
+
+    The particles of all events are stored in flat arrays. The particles of
+    event i are found in the range ``offsets[i]:offsets[i + 1]``. Per-event
+    quantities are stored in arrays of length N for N events.
+
+    generator: (str, str)
+        Info about the generator, its name and version.
+    kin: EventKinematicsBase
+        Info about initial state.
+    offsets: 1D array of int
+        Array of length N + 1 with the start of each event in the particle arrays.
+    nevent: 1D array of int
+        Which event in the sequence.
+    impact_parameter: 1D array of double
+        Impact parameter for nuclear collisions in mm.
+    n_wounded: 2D array of int
+        Number of wounded nucleons on sides A and B with shape (N, 2).
+    production_cross_section: 1D array of double
+        Production cross section in mb, see :class:`EventData`.
+    pid, status, charge, px, py, pz, en, m: 1D arrays
+        Particle properties, see :class:`EventData`.
+    vx, vy, vz, vt: 1D arrays of double or None
+        Production vertices, see :class:`EventData`. None if not requested.
+    mothers, daughters: 2D arrays of int or None
+        History, see :class:`EventData`. The indices refer to particles within
+        the same event. None if not requested or not available.
+    """
+
+    generator: tuple[str, str]
+    kin: EventKinematicsBase
+    offsets: np.ndarray
+    nevent: np.ndarray
+    impact_parameter: np.ndarray
+    n_wounded: np.ndarray
+    production_cross_section: np.ndarray
+    pid: np.ndarray
+    status: np.ndarray
+    charge: np.ndarray
+    px: np.ndarray
+    py: np.ndarray
+    pz: np.ndarray
+    en: np.ndarray
+    m: np.ndarray
+    vx: "np.ndarray | None" = None
+    vy: "np.ndarray | None" = None
+    vz: "np.ndarray | None" = None
+    vt: "np.ndarray | None" = None
+    mothers: "np.ndarray | None" = None
+    daughters: "np.ndarray | None" = None
+
+    def __len__(self):
+        """Return number of events."""
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i):
+        """
+        Return event i as EventData.
+
+        The arrays of the returned event are views into the batch.
+        """
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError("event index out of range")
+        sel = slice(self.offsets[i], self.offsets[i + 1])
+
+        def get(x):
+            return None if x is None else x[sel]
+
+        return EventData(
+            self.generator,
+            self.kin,
+            int(self.nevent[i]),
+            float(self.impact_parameter[i]),
+            tuple(int(x) for x in self.n_wounded[i]),
+            float(self.production_cross_section[i]),
+            self.pid[sel],
+            self.status[sel],
+            self.charge[sel],
+            self.px[sel],
+            self.py[sel],
+            self.pz[sel],
+            self.en[sel],
+            self.m[sel],
+            get(self.vx),
+            get(self.vy),
+            get(self.vz),
+            get(self.vt),
+            get(self.mothers),
+            get(self.daughters),
+        )
+
+
+class _EventBatchBuilder:
+    # Fills growing flat arrays, which are cut to size in finish().
+
+    _particle_fields = (
+        ("pid", np.int32),
+        ("status", np.int32),
+        ("charge", np.float64),
+        ("px", np.float64),
+        ("py", np.float64),
+        ("pz", np.float64),
+        ("en", np.float64),
+        ("m", np.float64),
+    )
+    _vertex_fields = ("vx", "vy", "vz", "vt")
+    _history_fields = ("mothers", "daughters")
+
+    def __init__(self, nevents, vertices, history, capacity=64):
+        capacity = max(nevents, 1) * capacity
+        self.size = 0
+        self.offsets = np.zeros(nevents + 1, dtype=np.int64)
+        self.nevent = np.zeros(nevents, dtype=np.int64)
+        self.impact_parameter = np.zeros(nevents)
+        self.n_wounded = np.zeros((nevents, 2), dtype=np.int64)
+        self.production_cross_section = np.zeros(nevents)
+        self.ievent = 0
+        self.arrays = {
+            key: np.empty(capacity, dtype) for key, dtype in self._particle_fields
+        }
+        if vertices:
+            for key in self._vertex_fields:
+                self.arrays[key] = np.empty(capacity)
+        if history:
+            for key in self._history_fields:
+                self.arrays[key] = np.empty((capacity, 2), dtype=np.int32)
+
+    def _reserve(self, npart):
+        capacity = len(self.arrays["pid"])
+        if self.size + npart <= capacity:
+            return
+        capacity = max(2 * capacity, self.size + npart)
+        for key, val in self.arrays.items():
+            new = np.empty((capacity,) + val.shape[1:], val.dtype)
+            new[: self.size] = val[: self.size]
+            self.arrays[key] = new
+
+    def _append_event_info(self, npart, nevent, b, n_wounded, cross_section):
+        i = self.ievent
+        self.nevent[i] = nevent
+        self.impact_parameter[i] = b
+        self.n_wounded[i] = n_wounded
+        self.production_cross_section[i] = cross_section
+        self.size += npart
+        self.ievent += 1
+        self.offsets[self.ievent] = self.size
+
+    def append_event(self, event):
+        npart = len(event)
+        self._reserve(npart)
+        sel = slice(self.size, self.size + npart)
+        for key, val in self.arrays.items():
+            x = getattr(event, key)
+            if x is None:
+                val[sel] = -1
+            else:
+                val[sel] = x
+        self._append_event_info(
+            npart,
+            event.nevent,
+            event.impact_parameter,
+            event.n_wounded,
+            event.production_cross_section,
+        )
+
+    def append_stack(self, reader, generator):
+        # copy directly from the particle stack of the generator,
+        # see MCEvent.__init__ for the equivalent code for a single event
+        evt = getattr(reader._lib, reader._hepevt)
+        npart = int(getattr(evt, reader._nhep))
+        self._reserve(npart)
+        sel = slice(self.size, self.size + npart)
+        a = self.arrays
+        a["pid"][sel] = getattr(evt, reader._idhep)[:npart]
+        a["status"][sel] = getattr(evt, reader._isthep)[:npart]
+        a["charge"][sel] = reader._charge_init(npart)
+        phep = getattr(evt, reader._phep)
+        for i, key in enumerate(("px", "py", "pz", "en", "m")):
+            a[key][sel] = phep[i, :npart]
+        if "vx" in a:
+            vhep = getattr(evt, reader._vhep)
+            for i, key in enumerate(self._vertex_fields):
+                a[key][sel] = vhep[i, :npart]
+        if "mothers" in a:
+            for key, name in zip(
+                self._history_fields, (reader._jmohep, reader._jdahep)
+            ):
+                x = getattr(evt, name).T[:npart].copy() if name else None
+                setattr(reader, key, x)
+            # model-specific conversion to zero-based indexing
+            reader._history_zero_indexing()
+            for key in self._history_fields:
+                x = getattr(reader, key)
+                a[key][sel] = -1 if x is None else x
+        self._append_event_info(
+            npart,
+            getattr(evt, reader._nevhep),
+            reader._get_impact_parameter(),
+            reader._get_n_wounded(),
+            generator._inel_or_prod_cross_section,
+        )
+
+    def finish(self, generator, kin):
+        n = self.size
+        arrays = {key: val[:n] for (key, val) in self.arrays.items()}
+        return EventBatch(
+            (generator.name, generator.version),
+            kin,
+            self.offsets[: self.ievent + 1],
+            self.nevent[: self.ievent],
+            self.impact_parameter[: self.ievent],
+            self.n_wounded[: self.ievent],
+            self.production_cross_section[: self.ievent],
+            **arrays,
+        )
+
+
+# dtypes of event fields for MCRun.precision == "single", charges stay floating
+# point since quarks have fractional charges
+_single_precision_dtypes = {
+    "pid": np.int32,
+    "status": np.int32,
+    "charge": np.float32,
+    "px": np.float32,
+    "py": np.float32,
+    "pz": np.float32,
+    "en": np.float32,
+    "m": np.float32,
+    "vx": np.float32,
+    "vy": np.float32,
+    "vz": np.float32,
+    "vt": np.float32,
+    "mothers": np.int32,
+    "daughters": np.int32,
+}
+
+
+def _to_single_precision(obj):
+    # Converts the fields of an event or batch. Lazy fields of an event which
+    # were not computed yet are not in the instance dict and are skipped.
+    d = obj.__dict__
+    for key, dtype in _single_precision_dtypes.items():
+        value = d.get(key)
+        if value is not None and value.dtype != dtype:
+            d[key] = value.astype(dtype)
+    return obj
+
+
+class _LazyField:
+    # Non-data descriptor which computes a field of an event on first access.
+    # The loader stored in the instance dict "_lazy" computes the whole group
+    # of fields that the field belongs to, the results are stored in the instance
+    # dict, which then shadows the descriptor.
+
+    def __set_name__(self, owner, name):
+        self.name = name
+
+    def __get__(self, instance, owner=None):
+        if instance is None:
+            return self
+        lazy = instance.__dict__.get("_lazy", {})
+        if self.name not in lazy:
+            raise AttributeError(
+                f"{type(instance).__name__!r} object has no attribute {self.name!r}"
+            )
+        d = instance.__dict__
+        for key, value in lazy[self.name]().items():
+            lazy.pop(key, None)
+            # do not overwrite fields which were assigned in the meantime
+            if key not in d:
+                d[key] = value
+        return d[self.name]
+
+
+_lazy_field_groups = (("charge",), ("vx", "vy", "vz", "vt"), ("mothers", "daughters"))
+
+
+class _LazyEventData(EventData):
+    """
+    Selection from an event with lazy fields.
+
+    Fields which were not yet computed in the original event are selected
+    when they are first accessed.
+    """
+
+    charge = _LazyField()
+    vx = _LazyField()
+    vy = _LazyField()
+    vz = _LazyField()
+    vt = _LazyField()
+    mothers = _LazyField()
+    daughters = _LazyField()
+
+    def __init__(self, event, arg, update_mothers):
+        d = event.__dict__
+        self.generator = event.generator
+        self.kin = event.kin
+        self.nevent = event.nevent
+        self.impact_parameter = event.impact_parameter
+        self.n_wounded = event.n_wounded
+        self.production_cross_section = event.production_cross_section
+        for key in ("pid", "status", "px", "py", "pz", "en", "m"):
+            setattr(self, key, d[key][arg])
+        self._lazy = {}
+        for group in _lazy_field_groups:
+            if group[0] in d:
+                self._select_group(event, group, arg, update_mothers)
+            else:
+                for key in group:
+                    self._lazy[key] = _partial_select(event, group, arg, update_mothers)
+
+    def _select_group(self, event, group, arg, update_mothers):
+        for key, value in _partial_select(event, group, arg, update_mothers)().items():
+            setattr(self, key, value)
+
+
+def _partial_select(event, group, arg, update_mothers):
+    def load():
+        if group[0] == "mothers":
+            mothers = event.mothers
+            return {
+                "mothers": select_mothers(arg, mothers) if update_mothers else None,
+                "daughters": None,
+            }
+        return {key: getattr(event, key)[arg] for key in group}
+
+    return load
+
+
+class _WithoutCrossSection:
+    # Proxy of a generator for event classes, which does not compute the
+    # cross section. Used by MCRun.interact, which does not return it.
+    _inel_or_prod_cross_section = np.nan
+
+    def __init__(self, generator):
+        self._generator = generator
+
+    def __getattr__(self, name):
+        return getattr(self._generator, name)
+
+
+class _EventArena:
+    """Preallocated field buffers for events with prepended beam particles.
+
+    Each buffer holds the two beam particles followed by the particle stack of
+    the generator. Both are written for each event, since the event may be
+    modified in place afterwards (e.g. boosted into another frame). Events
+    which use the arena are views into these buffers and are overwritten by
+    the next event.
+    """
+
+    def __init__(self, capacity):
+        self.capacity = capacity + 2
+        self._buffers = {}
+
+    def fill(self, beam, field, value, offset=0):
+        """Return view of beam rows and value, with offset added to value."""
+        beam_field = beam[field]
+        dtype = np.result_type(beam_field, value)
+        buf = self._buffers.get(field)
+        if buf is None or buf.dtype != dtype:
+            buf = np.empty((self.capacity,) + beam_field.shape[1:], dtype)
+            self._buffers[field] = buf
+        buf[:2] = beam_field
+        n = len(value) + 2
+        if offset:
+            # copy-out and index shift in a single pass
+            np.add(value, offset, out=buf[2:n], casting="unsafe")
+        else:
+            buf[2:n] = value
+        return buf[:n]
+
+
 class MCEvent(EventData, ABC):
     """
     The base class for interaction between user and all event generators.
@@ -521,6 +1017,19 @@ class MCEvent(EventData, ABC):
     _jmohep = "jmohep"
     _jdahep = "jdahep"
 
+    # index shift of history which is not yet applied, see _history_zero_indexing
+    _history_offset = 0
+    _arena = None  # _EventArena of the generator, see MCRun.reuse_buffers
+
+    # only used in lazy mode, see MCRun.lazy_events
+    charge = _LazyField()
+    vx = _LazyField()
+    vy = _LazyField()
+    vz = _LazyField()
+    vt = _LazyField()
+    mothers = _LazyField()
+    daughters = _LazyField()
+
     def __init__(self, generator):
         """
         Parameters
@@ -537,9 +1046,28 @@ class MCEvent(EventData, ABC):
         sel = slice(None, npart)
 
         phep = getattr(evt, self._phep)[:, sel]
-        vhep = getattr(evt, self._vhep)[:, sel]
 
         self._generator_frame = generator._frame
+        self._restore_beam_and_history = generator._restore_beam_and_history
+        lazy = getattr(generator, "lazy_events", False)
+        if getattr(generator, "reuse_buffers", False) and not lazy:
+            self._arena = generator._event_arena
+            if self._arena is None:
+                capacity = len(getattr(evt, self._idhep))
+                self._arena = generator._event_arena = _EventArena(capacity)
+        if lazy:
+            # charge, vertices and history are computed on first access
+            self._generator = generator
+            self._nevents = generator.nevents
+            charge = None
+            vhep = (None,) * 4
+            mothers = daughters = None
+        else:
+            charge = self._charge_init(npart)
+            vhep = getattr(evt, self._vhep)[:, sel]
+            mothers = getattr(evt, self._jmohep).T[sel] if self._jmohep else None
+            daughters = getattr(evt, self._jdahep).T[sel] if self._jdahep else None
+
         EventData.__init__(
             self,
             (generator.name, generator.version),
@@ -550,22 +1078,93 @@ class MCEvent(EventData, ABC):
             generator._inel_or_prod_cross_section,
             getattr(evt, self._idhep)[sel],
             getattr(evt, self._isthep)[sel],
-            self._charge_init(npart),
+            charge,
             *phep,
             *vhep,
-            mothers=getattr(evt, self._jmohep).T[sel] if self._jmohep else None,
-            daughters=getattr(evt, self._jdahep).T[sel] if self._jdahep else None,
+            mothers=mothers,
+            daughters=daughters,
         )
 
-        if generator._restore_beam_and_history:
-            self._history_zero_indexing()
+        if self._restore_beam_and_history:
+            if not lazy:
+                self._history_zero_indexing()
             self._repair_initial_beam()
+            if self._history_offset:
+                # _repair_initial_beam did not prepend the beam
+                self._shift_history(self._history_offset)
+
+        if lazy:
+            self._lazy = {}
+            for group in _lazy_field_groups:
+                for key in group:
+                    del self.__dict__[key]
+                    self._lazy[key] = self._lazy_loader(group)
+
+    def _lazy_loader(self, group):
+        return lambda: self._load_lazy(group)
+
+    def _load_lazy(self, fields):
+        # The beam repairs may depend on all fields, so we replay them on a
+        # fresh copy of the stack which contains only the requested fields.
+        if self._generator.nevents != self._nevents:
+            raise RuntimeError(
+                "lazy event fields must be accessed before the next event is "
+                "generated, use event.copy() to keep an event"
+            )
+        evt = getattr(self._lib, self._hepevt)
+        npart = getattr(evt, self._nhep)
+        sel = slice(None, npart)
+
+        shadow = object.__new__(type(self))
+        shadow.__dict__.update(self.__dict__)
+        shadow._lazy = {}
+        shadow.pid = getattr(evt, self._idhep)[sel].copy()
+        shadow.status = getattr(evt, self._isthep)[sel].copy()
+        phep = getattr(evt, self._phep)[:, sel]
+        for key, value in zip(("px", "py", "pz", "en", "m"), phep):
+            setattr(shadow, key, value.copy())
+        for group in _lazy_field_groups:
+            for key in group:
+                setattr(shadow, key, None)
+        if "charge" in fields:
+            shadow.charge = self._charge_init(npart)
+        if "vx" in fields:
+            vhep = getattr(evt, self._vhep)[:, sel]
+            for key, value in zip(fields, vhep):
+                setattr(shadow, key, value)
+        if "mothers" in fields:
+            for key, name in zip(fields, (self._jmohep, self._jdahep)):
+                value = getattr(evt, name).T[sel].copy() if name else None
+                setattr(shadow, key, value)
+
+        if self._restore_beam_and_history:
+            if "mothers" in fields:
+                shadow._history_zero_indexing()
+            shadow._repair_initial_beam()
+        if getattr(self._generator, "precision", "double") == "single":
+            _to_single_precision(shadow)
+        return {key: getattr(shadow, key) for key in fields}
+
+    def _select(self, arg, update_mothers):
+        if self.__dict__.get("_lazy"):
+            return _LazyEventData(self, arg, update_mothers)
+        return super()._select(arg, update_mothers)
 
     @abstractmethod
     def _charge_init(self, npart):
         # override this in derived to get charge info
         ...
 
+    @staticmethod
+    def _charge_from_table(pid, fallback):
+        # Looks up charges in the PDG table and calls the vectorized fallback
+        # only for particles which are not in the table (e.g. model-specific IDs)
+        charge = pdg2charge(pid)
+        unknown = np.isnan(charge)
+        if np.any(unknown):
+            charge[unknown] = fallback(pid[unknown])
+        return charge
+
     def _get_impact_parameter(self):
         # override this in derived
         return np.nan
@@ -588,22 +1187,54 @@ class MCEvent(EventData, ABC):
         raise NotImplementedError("The method must be implemented in derived class")
 
     def _history_zero_indexing(self):
-        self.mothers = self.mothers - 1
-        self.daughters = self.daughters - 1
+        if self._arena is None:
+            self._shift_history(-1)
+        else:
+            # applied together with the shift in _prepend_initial_beam
+            self._history_offset = -1
+
+    def _shift_history(self, offset):
+        self._history_offset = 0
+        for field in ("mothers", "daughters"):
+            value = getattr(self, field)
+            if value is not None:
+                setattr(self, field, value + offset)
 
     def _prepend_initial_beam(self):
         beam = self.kin._get_beam_data(self._generator_frame)
+        offset = self._history_offset + 2
+        self._history_offset = 0
         for field, beam_field in beam.items():
             event_field = getattr(self, field)
             if event_field is None:
                 continue
-            if field in ["mothers", "daughters"]:
-                res = np.concatenate((beam_field, event_field + 2))
+            shift = offset if field in ("mothers", "daughters") else 0
+            if self._arena is not None:
+                res = self._arena.fill(beam, field, event_field, shift)
             else:
+                if shift:
+                    event_field = event_field + shift
                 res = np.concatenate((beam_field, event_field))
             setattr(self, field, res)
 
 
+def _sample_spectrum(rng, nevents, spectrum, emin, emax):
+    # Draws energies from a power law with index spectrum or from a table of
+    # (energies, fluxes), which is interpolated in log-log
+    u = rng.random(nevents)
+    if np.ndim(spectrum) == 0:
+        a = 1.0 - spectrum
+        if a == 0:
+            return emin * (emax / emin) ** u
+        return (emin**a + u * (emax**a - emin**a)) ** (1.0 / a)
+    energy, flux = (np.asarray(x, dtype=float) for x in spectrum)
+    x = np.linspace(np.log(emin), np.log(emax), 1000)
+    # dN/dlnE = E dN/dE
+    y = np.exp(x + np.interp(x, np.log(energy), np.log(flux)))
+    cdf = np.concatenate([[0], np.cumsum(0.5 * (y[1:] + y[:-1]) * np.diff(x))])
+    return np.exp(np.interp(u * cdf[-1], cdf, x))
+
+
 # =========================================================================
 # MCRun
 # =========================================================================
@@ -614,13 +1245,21 @@ class MCRun(ABC):
     _projectiles = standard_projectiles
     _targets = Nuclei()
     _ecm_min = 10 * GeV  # default for many models
-    # Corresponds to current cross section in mb, updated when kinematics is set
-    _inel_or_prod_cross_section = None
+    # Cross sections in mb for _inel_or_prod_cross_section, computed on demand
+    _cross_section_memo = None
+    _skip_cross_section = False  # True while generating a spectrum
     _restore_beam_and_history = True
     nevents = 0  # number of generated events so far
+    _lazy_events = False
+    _reuse_buffers = False
+    _precision = "double"
+    _event_arena = None  # _EventArena, if reuse_buffers is True
     _unstable_pids = set(all_unstable_pids)
     _final_state_particles = []
+    _must_decay_pids = None  # sorted array, computed from _final_state_particles
     _decay_handler = None  # Pythia8DecayHandler instance if activated
+    _composite_cache = None  # (kinematics, kinematics of components)
+    _interaction_setups = None  # kinematics for interact() by beams
 
     def __init__(self, seed):
         if not self._restartable:
@@ -636,6 +1275,11 @@ class MCRun(ABC):
         except ModuleNotFoundError:
             self._lib = importlib.import_module(f"{self._library_name}")
 
+        self._reseed(seed)
+
+    def _reseed(self, seed):
+        # Replaces the random number generator, which the Fortran models use
+        # through npy.bitgen. Also used by forked workers, see chromo.parallel.
         self._rng = np.random.default_rng(seed)
         if hasattr(self._lib, "npy"):
             self._lib.npy.bitgen = self._rng.bit_generator.ctypes.bit_generator.value
@@ -645,18 +1289,219 @@ class MCRun(ABC):
         which launches the underlying event generator
         and returns the event as MCEvent object
         """
+        for _ in self._generate_events(nevents):
+            event = self._event_class(self)
+            # boost into frame requested by user
+            self.kinematics.apply_boost(event, self._frame)
+            self._validate_decay(event)
+            yield self._apply_precision(event)
+
+    def generate_batch(self, nevents, *, vertices=False, history=False):
+        """Generate events and return them in columnar form.
+
+        This is faster than iterating over the generator when events are small,
+        since no :class:`MCEvent` object is created per event. The particles of
+        all events are copied directly from the particle stack of the generator
+        into flat arrays, see :class:`EventBatch`.
+
+        The final state is the same as for events generated with
+        :meth:`__call__`, but the initial beam particles and the history are
+        stored as provided by the generator, without the repairs applied by
+        :class:`MCEvent`. The fast path is not available if a decay handler is
+        active or if the model does not use a HEPEVT-like particle stack. In
+        this case, events are generated with :meth:`__call__` and then copied.
+
+        Parameters
+        ----------
+        nevents : int
+            Number of events.
+        vertices : bool, optional
+            Whether to store the production vertices (default is False).
+        history : bool, optional
+            Whether to store mothers and daughters (default is False).
+
+        Returns
+        -------
+        EventBatch
+        """
+        builder = _EventBatchBuilder(nevents, vertices, history)
+        kin = self.kinematics
+        if self._decay_handler or not issubclass(self._event_class, MCEvent):
+            for event in self(nevents):
+                builder.append_event(event)
+            return self._apply_precision(builder.finish(self, kin))
+
+        # object which only provides access to the particle stack
+        reader = self._event_class.__new__(self._event_class)
+        reader._lib = self._lib
+        # events with the same kinematics are boosted together
+        setups = {}
+        event_setup = np.empty(nevents, dtype=np.intp)
+        for ievent, _ in enumerate(self._generate_events(nevents)):
+            key = (id(self.kinematics), self._frame)
+            if key not in setups:
+                setups[key] = (len(setups), self.kinematics, self._frame)
+            event_setup[ievent] = setups[key][0]
+            builder.append_stack(reader, self)
+        batch = builder.finish(self, kin)
+        if len(setups) == 1:
+            _, seg_kin, frame = next(iter(setups.values()))
+            seg_kin.apply_boost(batch, frame)
+        else:
+            particle_setup = np.repeat(event_setup, np.diff(batch.offsets))
+            for isetup, seg_kin, frame in setups.values():
+                mask = particle_setup == isetup
+                view = SimpleNamespace(en=batch.en[mask], pz=batch.pz[mask])
+                seg_kin.apply_boost(view, frame)
+                batch.en[mask] = view.en
+                batch.pz[mask] = view.pz
+        self._validate_decay(batch)
+        return self._apply_precision(batch)
+
+    def interact(self, projectile, elab, target):
+        """Generate a single interaction with minimal overhead.
+
+        This is meant for cascade codes, which need one interaction with a
+        different projectile, energy and target each time. The checks of the
+        particles and the construction of the kinematics are done once per
+        projectile and target, the cross section is not computed, and no
+        event object is created. The current kinematics of the generator are
+        replaced.
+
+        Parameters
+        ----------
+        projectile : str or int
+            Projectile.
+        elab : float
+            Total energy of the projectile in the lab frame in GeV. For nuclei,
+            it is the energy per nucleon.
+        target : str or int
+            Target.
+
+        Returns
+        -------
+        pid, px, py, pz, en : arrays
+            Final state particles in the lab frame.
+        """
+        if self._interaction_setups is None:
+            self._interaction_setups = {}
+        setup = self._interaction_setups.get((projectile, target))
+        if setup is None:
+            kin = EventKinematicsWithRestframe(projectile, target, elab=elab)
+            self._check_kinematics(kin)
+            self._interaction_setups[(projectile, target)] = kin
+        else:
+            kin = setup._with_elab(elab)
+            if kin.ecm < self._ecm_min:
+                self._check_kinematics(kin)
+        self._kinematics = kin
+        self._set_kinematics(kin)
+
+        nretries = 0
+        while not self._generate():
+            nretries += 1
+            if nretries > 1000:
+                raise RuntimeError("More than 1000 retries, aborting")
+        self.nevents += 1
+
+        if issubclass(self._event_class, MCEvent):
+            reader = self._event_class.__new__(self._event_class)
+            reader._lib = self._lib
+            evt = getattr(self._lib, reader._hepevt)
+            npart = getattr(evt, reader._nhep)
+            sel = getattr(evt, reader._isthep)[:npart] == 1
+            pid = getattr(evt, reader._idhep)[:npart][sel]
+            phep = getattr(evt, reader._phep)[:, :npart][:, sel]
+            fs = SimpleNamespace(
+                pid=pid,
+                status=np.ones(len(pid), dtype=np.int32),
+                px=phep[0],
+                py=phep[1],
+                pz=phep[2],
+                en=phep[3],
+                m=phep[4],
+            )
+        else:
+            fs = self._event_class(_WithoutCrossSection(self))
+        kin.apply_boost(fs, self._frame)
+
+        if self._decay_handler and not isinstance(fs, EventData):
+            # remaining fields needed by the decay handlers
+            n = len(fs.pid)
+            for key in ("vx", "vy", "vz", "vt"):
+                setattr(fs, key, np.zeros(n))
+            fs.charge = np.zeros(n, dtype=np.float32)
+            fs.mothers = fs.daughters = None
+        self._validate_decay(fs)
+        sel = fs.status == 1
+        return fs.pid[sel], fs.px[sel], fs.py[sel], fs.pz[sel], fs.en[sel]
+
+    def generate_spectrum(self, nevents, spectrum, emin, emax):
+        """Generate events with lab energies sampled from a spectrum.
+
+        The projectile and target are taken from the current kinematics. Each
+        event gets its own fixed-target kinematics with a lab energy drawn
+        from the spectrum, so that ``event.kin`` and ``event.xlab`` refer to
+        this energy. The events are returned in the fixed-target frame.
+
+        All energies are drawn at once and the events are generated in order
+        of decreasing energy, which keeps the changes between consecutive
+        kinematics small. Models which pass the energy directly to each call
+        of the generator (e.g. Sibyll and Sophia) skip the re-initialization.
+        The previous kinematics are restored afterwards.
+
+        Since every event has a different energy, the production cross section
+        of the events is not computed and set to NaN. Use
+        :meth:`cross_section` with ``event.kin`` if it is needed.
+
+        Parameters
+        ----------
+        nevents : int
+            Number of events.
+        spectrum : float or (array, array)
+            Spectral index :math:`\\gamma` of a power law
+            :math:`dN/dE \\propto E^{-\\gamma}` or a table of energies and
+            differential fluxes, which is interpolated in log-log.
+        emin, emax : float
+            Range of lab energies in GeV. For nuclei, these are energies per
+            nucleon.
+
+        Yields
+        ------
+        MCEvent
+        """
+        kin = self.kinematics
+        energies = _sample_spectrum(self._rng, nevents, spectrum, emin, emax)
+        template = EventKinematicsWithRestframe(kin.p1, kin.p2, elab=emax)
+        self._check_kinematics(template._with_elab(emin))
+        self._skip_cross_section = True
+        try:
+            for elab in np.sort(energies)[::-1]:
+                self._switch_energy(template._with_elab(elab))
+                yield from self(1)
+        finally:
+            self._skip_cross_section = False
+            self.kinematics = kin
+
+    def _switch_energy(self, kin):
+        # Fast switch to kinematics which only differ in the energy. Models
+        # override this if less work than in _set_kinematics is needed.
+        self._kinematics = kin
+        self._set_kinematics(kin)
+
+    def _generate_events(self, nevents):
+        # Runs the generator and yields after each successfully generated event.
         nretries = 0
         for nev in self._composite_plan(nevents):
+            if nev > 0:
+                # compute before the model fills its particle stack
+                self._update_cross_section()
             while nev > 0:
                 if self._generate():
                     nretries = 0
                     self.nevents += 1
                     nev -= 1
-                    event = self._event_class(self)
-                    # boost into frame requested by user
-                    self.kinematics.apply_boost(event, self._frame)
-                    self._validate_decay(event)
-                    yield event
+                    yield
                     continue
                 nretries += 1
                 if nretries % 50 == 0:
@@ -668,6 +1513,66 @@ class MCRun(ABC):
                 if nretries > 1000:
                     raise RuntimeError("More than 1000 retries, aborting")
 
+    @property
+    def lazy_events(self):
+        """Whether fields of events are computed on first access.
+
+        If True, the charge, vertices, mothers and daughters of an event are
+        read from the particle stack of the generator when they are first
+        accessed. This saves time if an analysis uses only a few fields.
+        These fields must be accessed before the next event is generated,
+        otherwise a RuntimeError is raised. Use :meth:`EventData.copy` to keep
+        a complete event.
+        """
+        return self._lazy_events
+
+    @lazy_events.setter
+    def lazy_events(self, value):
+        self._lazy_events = bool(value)
+
+    @property
+    def reuse_buffers(self):
+        """Whether events share preallocated buffers of the generator.
+
+        For models which add the beam particles to the particle stack (e.g.
+        Sibyll, QGSJet, UrQMD, Sophia), the fields of each event are normally
+        new arrays. If True, the fields are written into buffers which are
+        allocated once per generator instead, so that no memory is allocated
+        per event. This is faster if events are processed one by one, but the
+        fields of an event are overwritten by the next event and must not be
+        modified. Use :meth:`EventData.copy` to keep an event. Ignored if
+        :attr:`lazy_events` is True.
+        """
+        return self._reuse_buffers
+
+    @reuse_buffers.setter
+    def reuse_buffers(self, value):
+        self._reuse_buffers = bool(value)
+
+    @property
+    def precision(self):
+        """Precision of the fields of generated events and batches.
+
+        If "double" (default), momenta, masses, charges and vertices are
+        stored as float64. If "single", they are stored as float32 and the
+        PDG IDs, status codes and the history as int32, which halves the
+        memory needed for large events and batches. The conversion is done
+        after the boost into the frame of the kinematics, which is always
+        computed in double precision.
+        """
+        return self._precision
+
+    @precision.setter
+    def precision(self, value):
+        if value not in ("single", "double"):
+            raise ValueError(f"precision must be 'single' or 'double', got {value!r}")
+        self._precision = value
+
+    def _apply_precision(self, event):
+        if self._precision == "single":
+            _to_single_precision(event)
+        return event
+
     @property
     def seed(self):
         # This is using private interface to get the seed. This may be brittle.
@@ -731,17 +1636,43 @@ class MCRun(ABC):
         pass
 
     def _composite_plan(self, nevents):
+        # Yields numbers of events to generate. For a CompositeTarget, each event
+        # gets a random component, so that events of different components are
+        # interleaved. Runs of the same component are generated without switching.
         kin = self.kinematics
         if isinstance(kin.p2, CompositeTarget):
-            nevents = self._rng.multinomial(nevents, kin.p2.fractions)
-            ek = copy.deepcopy(kin)
-            for c, k in zip(kin.p2.components, nevents):
-                ek.p2 = c
-                with self._temporary_kinematics(ek):
-                    yield k
+            components = self._composite_kinematics(kin)
+            choice = self._rng.choice(len(components), nevents, p=kin.p2.fractions)
+            starts = np.flatnonzero(np.diff(choice, prepend=-1))
+            counts = np.diff(starts, append=nevents)
+            try:
+                for i, k in zip(choice[starts], counts):
+                    self._switch_component(components[i])
+                    yield int(k)
+            finally:
+                self._switch_component(kin)
         else:
             yield nevents
 
+    def _composite_kinematics(self, kin):
+        # Kinematics for each component of a CompositeTarget, computed once
+        cache = self._composite_cache
+        if cache is None or cache[0] is not kin:
+            components = []
+            for c in kin.p2.components:
+                ek = copy.deepcopy(kin)
+                ek.p2 = c
+                components.append(ek)
+            cache = self._composite_cache = (kin, components)
+        return cache[1]
+
+    def _switch_component(self, kin):
+        # Fast switch between the components of a CompositeTarget and back. The
+        # kinematics were already checked when the CompositeTarget was set.
+        # Models override this if less work than in _set_kinematics is needed.
+        self._kinematics = kin
+        self._set_kinematics(kin)
+
     @property
     def random_state(self):
         return self._rng.__getstate__()
@@ -779,10 +1710,35 @@ class MCRun(ABC):
         self._kinematics = kin
         self._set_kinematics(kin)
 
-        if (kin.p1.is_nucleus and kin.p1.A > 1) or (kin.p2.is_nucleus and kin.p2.A > 1):
-            self._inel_or_prod_cross_section = self.cross_section().prod
-        else:
-            self._inel_or_prod_cross_section = self.cross_section().inelastic
+    @property
+    def _inel_or_prod_cross_section(self):
+        # Cross section in mb for the current kinematics, which is stored in the
+        # events. The production cross section is used for nuclei.
+        return self._update_cross_section()
+
+    def _update_cross_section(self):
+        # Returns _inel_or_prod_cross_section. It is only computed when it is
+        # first needed and then memoized, so that switching kinematics, e.g. for
+        # the components of a CompositeTarget, is cheap.
+        if self._skip_cross_section:
+            return np.nan
+        if self._cross_section_memo is None:
+            self._cross_section_memo = {}
+        kin = self.kinematics
+        key = _cross_section_key(kin)
+        value = self._cross_section_memo.get(key)
+        if value is None:
+            if len(self._cross_section_memo) >= 1024:
+                # energy scans should not grow the memo without limit
+                self._cross_section_memo.clear()
+            if (kin.p1.is_nucleus and kin.p1.A > 1) or (
+                kin.p2.is_nucleus and kin.p2.A > 1
+            ):
+                value = self.cross_section().prod
+            else:
+                value = self.cross_section().inelastic
+            self._cross_section_memo[key] = value
+        return value
 
     def cross_section(self, kin=None, max_info=False):
         """Cross sections according to current setup.
@@ -796,6 +1752,7 @@ class MCRun(ABC):
             Return full maximal information about interaction cross sections for
             nucleus-nucleus case. Slow - uses Monte Carlo integration. Number of
             trials is controled separately with `generator.n_trials` attribute.
+            See :func:`chromo.glauber.cross_section` for a parallel version.
         """
         with self._temporary_kinematics(kin):
             kin2 = self.kinematics
@@ -833,18 +1790,24 @@ class MCRun(ABC):
         If any unstable particles are not yet decayed, it attempts to decay them
         using the decay_handler.
         """
+        must_decay = self._must_decay_pids
+        if must_decay is None:
+            # rebuilt only after the final state particles were changed
+            must_decay = np.setdiff1d(all_unstable_pids, self._final_state_particles)
+            self._must_decay_pids = must_decay
+        if len(must_decay) == 0:
+            return
+
         final_pids = event.pid[event.status == 1]
-        may_decay = np.isin(final_pids, all_unstable_pids)
+        idx = np.searchsorted(must_decay, final_pids)
+        idx[idx == len(must_decay)] = 0
+        not_decayed = must_decay[idx] == final_pids
 
-        if not np.all(np.isin(final_pids[may_decay], self._final_state_particles)):
+        if np.any(not_decayed):
             if self._decay_handler:
                 self._decay_handler(event)
             else:
-                final_pids_dec = final_pids[may_decay]
-                not_decayed = np.logical_not(
-                    np.isin(final_pids_dec, self._final_state_particles)
-                )
-                not_decayed_pids = set(final_pids_dec[not_decayed])
+                not_decayed_pids = set(final_pids[not_decayed])
                 warnings.warn(
                     f"{self.pyname}: {not_decayed_pids} haven't been decayed. "
                     "Consider to use generator._activate_decay_handler(on=True)",
@@ -934,6 +1897,7 @@ class MCRun(ABC):
             if len(self._final_state_particles) > 0:
                 remove = np.isin(self._final_state_particles, pdgid_list)
                 self._final_state_particles = self._final_state_particles[~remove]
+        self._must_decay_pids = None
 
         if update_decay_handler:
             self._sync_decay_handler()
@@ -958,7 +1922,7 @@ class MCRun(ABC):
     def _set_stable(self, pdgid, stable):
         pass
 
-    def _activate_decay_handler(self, on=True, *, seed=None):
+    def _activate_decay_handler(self, on=True, *, seed=None, backend="pythia8"):
         """
         Activates the Pythia8 decay handler for any of the generators
         except Pythia8 itself.
@@ -975,6 +1939,10 @@ class MCRun(ABC):
 
         Args:
             on (bool)       : If `True`, the decay handler is activated or destroyed
+            backend (str)   : "pythia8" (default) or "numpy". The numpy backend
+                              decays common short-lived hadrons itself and uses
+                              Pythia8 only for other particles,
+                              see :mod:`chromo.decay`.
 
         Returns:
             None
@@ -985,7 +1953,18 @@ class MCRun(ABC):
             self._decay_handler = None
             return
 
-        if not self._decay_handler:
+        if backend not in ("pythia8", "numpy"):
+            raise ValueError(f"unknown decay handler backend {backend!r}")
+
+        if backend == "numpy" and not isinstance(
+            self._decay_handler, NumpyDecayHandler
+        ):
+            self._decay_handler = NumpyDecayHandler(
+                self._final_state_particles, seed=seed
+            )
+        elif backend == "pythia8" and not isinstance(
+            self._decay_handler, Pythia8DecayHandler
+        ):
             try:
                 self._decay_handler = Pythia8DecayHandler(
                     self._final_state_particles, seed=seed
@@ -0,0 +1,224 @@
+"""Tabulated cross sections for fast lookups.
+
+Computing a cross section with :meth:`chromo.common.MCRun.cross_section` calls
+into the model for each kinematics. Applications like air shower cascades need
+the inelastic cross section for many energies. The :class:`CrossSectionTable`
+computes the cross sections of a model once on a grid of lab energies, stores
+the table on disk, and interpolates the table for arrays of energies.
+
+Example::
+
+    generator = chromo.models.Sibyll23d(kin)
+    table = CrossSectionTable(generator)
+    sigma = table.sigma_prod_air("p", np.geomspace(1e2, 1e9, 1000))
+"""
+
+import dataclasses
+import hashlib
+import warnings
+
+import numpy as np
+
+from chromo.common import CrossSectionData
+from chromo.constants import GeV, air_composition, standard_projectiles
+from chromo.kinematics import FixedTarget
+from chromo.util import CompositeTarget, _data_dir, process_particle
+
+__all__ = ("CrossSectionTable",)
+
+_fields = tuple(f.name for f in dataclasses.fields(CrossSectionData))
+
+
+def _supported(generator, kind, particles, default):
+    # Returns PDG IDs of the particles which the generator supports. Unsupported
+    # particles are skipped, with a warning if they were requested explicitly.
+    explicit = particles is not None
+    if particles is None:
+        particles = default
+    particles = [int(process_particle(p)) for p in particles]
+    supported = getattr(generator, kind)
+    skipped = [p for p in particles if abs(p) not in supported]
+    if skipped and explicit:
+        warnings.warn(
+            f"{generator.label} does not support {kind} {skipped}, they are skipped",
+            RuntimeWarning,
+        )
+    return tuple(p for p in particles if abs(p) in supported)
+
+
+class CrossSectionTable:
+    """Cross sections of a model on a grid of lab energies.
+
+    The table contains all fields of :class:`chromo.common.CrossSectionData`
+    for each projectile, target and energy. It is computed when it is first
+    requested and stored in the data directory of chromo. Tables for the same
+    model version and grid are loaded from disk afterwards. Settings of the
+    generator which change the cross sections (e.g. the Pythia8 configuration)
+    are not part of the key, use ``cache=False`` in this case.
+
+    Cross sections for other energies are interpolated linearly in the
+    logarithm of the energy. NaN is returned for energies outside of the grid
+    and for combinations not supported by the model.
+    """
+
+    def __init__(
+        self,
+        generator,
+        energies=None,
+        projectiles=None,
+        targets=None,
+        *,
+        cache=True,
+    ):
+        """
+        Parameters
+        ----------
+        generator : MCRun
+            Initialized generator.
+        energies : array of float, optional
+            Grid of total lab energies of the projectile in GeV. Default is 10
+            points per decade from 10 GeV to 1e11 GeV.
+        projectiles : collection of str or int, optional
+            Projectiles in the table. Default are the standard projectiles
+            which the generator supports.
+        targets : collection of str or int, optional
+            Targets in the table. The default are the proton and the components
+            of air. Projectiles and targets not supported by the generator are
+            skipped.
+        cache : bool, optional
+            Whether to load and store the table on disk (default is True).
+        """
+        if energies is None:
+            energies = np.geomspace(10 * GeV, 1e11 * GeV, 101)
+        self.energies = np.asarray(energies, dtype=float)
+        self.projectiles = _supported(
+            generator, "projectiles", projectiles, sorted(standard_projectiles)
+        )
+        self.targets = _supported(
+            generator, "targets", targets, ("p", *air_composition)
+        )
+        self.label = generator.label
+
+        path = None
+        if cache:
+            path = _data_dir("cross_section_tables") / f"{self.label}_{self._key}.npz"
+        if path is not None and path.exists():
+            with np.load(path) as data:
+                self._table = data["table"]
+        else:
+            self._table = self._compute(generator)
+            if path is not None:
+                np.savez(path, table=self._table)
+        self._log_energies = np.log(self.energies)
+
+    @property
+    def _key(self):
+        # identifies the grid
+        h = hashlib.sha1(self.energies.tobytes())
+        h.update(np.array(self.projectiles + self.targets).tobytes())
+        return h.hexdigest()[:16]
+
+    def _compute(self, generator):
+        table = np.full(
+            (
+                len(_fields),
+                len(self.projectiles),
+                len(self.targets),
+                len(self.energies),
+            ),
+            np.nan,
+        )
+        # The kinematics are set once per projectile and target, only the
+        # energy is switched for each point of the grid.
+        prev = generator.kinematics
+        try:
+            for i, p in enumerate(self.projectiles):
+                for j, t in enumerate(self.targets):
+                    template = FixedTarget(np.max(self.energies), p, t)
+                    initialized = False
+                    for k, en in enumerate(self.energies):
+                        try:
+                            kin = template._with_elab(en)
+                            generator._check_kinematics(kin)
+                            if initialized:
+                                generator._switch_energy(kin)
+                            else:
+                                generator.kinematics = kin
+                                initialized = True
+                            cs = generator.cross_section()
+                        except ValueError:
+                            # combination or energy not supported
+                            continue
+                        table[:, i, j, k] = dataclasses.astuple(cs)
+        finally:
+            generator.kinematics = prev
+        return table
+
+    def _interpolate(self, projectile, target, energy):
+        if int(projectile) not in self.projectiles:
+            raise ValueError(f"projectile {projectile} is not in the table")
+        if int(target) not in self.targets:
+            raise ValueError(f"target {target} is not in the table")
+        i = self.projectiles.index(int(projectile))
+        j = self.targets.index(int(target))
+        x = np.log(energy)
+        return [
+            np.interp(x, self._log_energies, v, left=np.nan, right=np.nan)
+            for v in self._table[:, i, j]
+        ]
+
+    def __call__(self, projectile, target, energy):
+        """Return cross sections for lab energies.
+
+        Parameters
+        ----------
+        projectile : str or int
+            Projectile, which must be in the table.
+        target : str or int or CompositeTarget
+            Target. For a composite target, all components must be in the table.
+        energy : float or array of float
+            Total lab energies of the projectile in GeV.
+
+        Returns
+        -------
+        CrossSectionData
+            The fields are arrays if energy is an array.
+        """
+        projectile = process_particle(projectile)
+        if not isinstance(target, CompositeTarget):
+            target = process_particle(target)
+        energy = np.asarray(energy, dtype=float)
+        if isinstance(target, CompositeTarget):
+            values = np.zeros((len(_fields),) + energy.shape)
+            for component, fraction in zip(target.components, target.fractions):
+                values += fraction * np.array(
+                    self._interpolate(projectile, component, energy)
+                )
+        else:
+            values = self._interpolate(projectile, target, energy)
+        return CrossSectionData(*values)
+
+    def sigma_prod_air(self, projectile, energy):
+        """Return the production cross section on air in mb.
+
+        Components of air which are not in the table are left out with a
+        warning, the fractions of the others are renormalized.
+
+        Parameters
+        ----------
+        projectile : str or int
+            Projectile, which must be in the table.
+        energy : float or array of float
+            Total lab energies of the projectile in GeV.
+        """
+        missing = [t for t in air_composition if t not in self.targets]
+        if missing:
+            warnings.warn(
+                f"air components {missing} are not in the table, they are left out",
+                RuntimeWarning,
+            )
+        air = CompositeTarget(
+            [(t, f) for t, f in air_composition.items() if t in self.targets],
+            label="air",
+        )
+        return self(projectile, air, energy).prod
@@ -0,0 +1,384 @@
+"""Fast decays of common short-lived hadrons.
+
+The :class:`NumpyDecayHandler` decays particles like pi0, eta, K0S and the
+strange baryons with NumPy, without calling an external generator. All
+particles of an event (or of a whole :class:`chromo.common.EventBatch`) which
+decay in the same channel are processed together. Decays are generated with
+isotropic two-body and flat three-body phase space, the decay vertices are
+sampled from the proper lifetime.
+
+The branching ratios are taken from the Review of Particle Physics (PDG 2022),
+since the ``particle`` package does not provide decay tables. Only the dominant
+channels are included, the branching ratios are normalized to unity. Species
+which are not in the table are decayed with :class:`Pythia8DecayHandler`, if
+it is available.
+
+Example::
+
+    generator = chromo.models.QGSJetII04(kin)
+    generator._activate_decay_handler(on=True, backend="numpy")
+"""
+
+import numpy as np
+from particle import Particle
+
+from chromo.decay_handler import Pythia8DecayHandler
+from chromo.util import mass, pdg2charge
+
+__all__ = ("NumpyDecayHandler",)
+
+# parent: ((branching ratio, daughters), ...)
+_decay_table = {
+    111: ((0.98823, (22, 22)),),
+    221: (
+        (0.3936, (22, 22)),
+        (0.3257, (111, 111, 111)),
+        (0.2302, (211, -211, 111)),
+        (0.0428, (211, -211, 22)),
+    ),
+    223: (
+        (0.892, (211, -211, 111)),
+        (0.0833, (111, 22)),
+        (0.0153, (211, -211)),
+    ),
+    310: ((0.6920, (211, -211)), (0.3069, (111, 111))),
+    3122: ((0.639, (2212, -211)), (0.358, (2112, 111))),
+    3222: ((0.5157, (2212, 111)), (0.4831, (2112, 211))),
+    3212: ((1.0, (3122, 22)),),
+    3112: ((0.99848, (2112, -211)),),
+    3322: ((0.99524, (3122, 111)),),
+    3312: ((0.99887, (3122, -211)),),
+    3334: ((0.678, (3122, -321)), (0.236, (3322, -211)), (0.086, (3312, 111))),
+}
+
+
+def _conjugate(pid):
+    p = Particle.from_pdgid(pid)
+    return int(p.invert().pdgid) if p.invert() != p else pid
+
+
+def _make_channels():
+    # Returns flat arrays which describe all channels, sorted by parent
+    table = dict(_decay_table)
+    for pid, channels in _decay_table.items():
+        anti = _conjugate(pid)
+        if anti != pid:
+            table[anti] = tuple(
+                (br, tuple(_conjugate(d) for d in daughters))
+                for (br, daughters) in channels
+            )
+
+    parents = []
+    cumulative = []
+    daughters = []
+    for rank, pid in enumerate(sorted(table)):
+        channels = table[pid]
+        total = sum(br for (br, _) in channels)
+        cum = 0.0
+        for br, d in channels:
+            cum += br / total
+            parents.append(pid)
+            # offset by rank, so that a single searchsorted finds the channel
+            cumulative.append(rank + cum)
+            daughters.append(d)
+        # the sum may be slightly below 1 due to round-off, which would
+        # select a channel of the next parent
+        cumulative[-1] = rank + 1
+    return np.array(parents, dtype=np.int64), np.array(cumulative), daughters
+
+
+def _two_body_momentum(m, m1, m2):
+    # momentum of the daughters in the rest frame of the mother
+    x = (m**2 - (m1 + m2) ** 2) * (m**2 - (m1 - m2) ** 2)
+    return np.sqrt(np.maximum(x, 0)) / (2 * m)
+
+
+def _isotropic(p, rng):
+    # returns momentum vectors with length p and random direction
+    cos_theta = rng.uniform(-1, 1, len(p))
+    phi = rng.uniform(0, 2 * np.pi, len(p))
+    sin_theta = np.sqrt(1 - cos_theta**2)
+    return np.transpose(
+        (p * sin_theta * np.cos(phi), p * sin_theta * np.sin(phi), p * cos_theta)
+    )
+
+
+def _boost(en, p, parent_en, parent_p, parent_m):
+    # boosts four-vectors (en, p) from the rest frame of the parent into the
+    # frame where the parent has four-momentum (parent_en, parent_p)
+    pp = np.sum(parent_p * p, axis=1)
+    en_lab = (parent_en * en + pp) / parent_m
+    f = pp / (parent_m * (parent_en + parent_m)) + en / parent_m
+    return en_lab, p + f[:, np.newaxis] * parent_p
+
+
+def _two_body(m, m1, m2, rng):
+    p = _isotropic(_two_body_momentum(m, m1, m2), rng)
+    e1 = np.sqrt(m1**2 + np.sum(p**2, axis=1))
+    e2 = np.sqrt(m2**2 + np.sum(p**2, axis=1))
+    return (e1, p), (e2, -p)
+
+
+def _three_body(m, m1, m2, m3, rng):
+    # The invariant mass m12 of the pair 1+2 is sampled with accept-reject
+    # from the phase space density, which is proportional to
+    # p(m -> m12 + m3) * p(m12 -> m1 + m2). The first factor decreases and
+    # the second increases with m12, so the product of their maxima is used
+    # as the envelope.
+    n = len(m)
+    m12 = np.empty(n)
+    todo = np.arange(n)
+    while len(todo):
+        lo = m1 + m2
+        hi = m[todo] - m3
+        x = rng.uniform(lo, hi)
+        w = _two_body_momentum(m[todo], x, m3) * _two_body_momentum(x, m1, m2)
+        wmax = _two_body_momentum(m[todo], lo, m3) * _two_body_momentum(hi, m1, m2)
+        accept = rng.uniform(0, 1, len(todo)) * wmax <= w
+        m12[todo[accept]] = x[accept]
+        todo = todo[~accept]
+
+    (e12, p12), (e3, p3) = _two_body(m, m12, m3, rng)
+    (e1, p1), (e2, p2) = _two_body(m12, m1, m2, rng)
+    e1, p1 = _boost(e1, p1, e12, p12, m12)
+    e2, p2 = _boost(e2, p2, e12, p12, m12)
+    return (e1, p1), (e2, p2), (e3, p3)
+
+
+class NumpyDecayHandler:
+    def __init__(self, stable_pids, seed=None, fallback=True):
+        """
+        Decay common short-lived hadrons with NumPy.
+
+        Parameters:
+            stable_pids (list[int]): List of PDG IDs of stable particles.
+            seed (int): Random seed.
+            fallback (bool): If True, use a :class:`Pythia8DecayHandler` for
+                unstable particles which are not supported, if it is available.
+        """
+        self._rng = np.random.default_rng(seed)
+        self._parents, self._cumulative, self._daughters = _make_channels()
+        self._masses = [tuple(mass(d) for d in x) for x in self._daughters]
+        self._species = np.unique(self._parents)
+        self._species_mass = np.array([mass(x) for x in self._species])
+        self._species_ctau = np.array(
+            [Particle.from_pdgid(x).ctau or 0.0 for x in self._species]
+        )
+        self._fallback = None
+        if fallback:
+            try:
+                self._fallback = Pythia8DecayHandler(stable_pids, seed=seed)
+            except ModuleNotFoundError:
+                pass
+        self.set_stable(stable_pids)
+
+    @property
+    def supported_pids(self):
+        """PDG IDs of particles which are decayed by this handler."""
+        return self._species
+
+    def set_stable(self, stable_pids):
+        stable = np.unique(np.asarray(stable_pids, dtype=np.int64))
+        self._unstable = np.setdiff1d(self._species, stable)
+        if self._fallback:
+            self._fallback.set_stable(stable)
+            self.all_unstable_pids = np.union1d(
+                self._unstable, self._fallback.all_unstable_pids
+            )
+            self.all_stable_pids = self._fallback.all_stable_pids
+        else:
+            self.all_unstable_pids = self._unstable
+            self.all_stable_pids = np.union1d(
+                stable, np.setdiff1d(self._species, self._unstable)
+            )
+
+    def __call__(self, event):
+        """
+        Decay particles in the provided `event` that are not set as `stable`.
+
+        The decay products are appended to the event. The decayed particles
+        have their `event.status` set to 2. Unsupported particles are decayed
+        afterwards by the Pythia8 decay handler, if it is available.
+
+        Parameters:
+            event (EventData): The event containing particles to be decayed.
+        """
+        if len(event.pid) == 0:
+            return
+
+        n = len(event.pid)
+        fields = {key: getattr(event, key) for key in _fields}
+        for key in ("mothers", "daughters"):
+            if fields[key] is None:
+                fields[key] = np.full((n, 2), -1, dtype=np.int32)
+        fields = self._decay(fields)
+        del fields["_group"]
+        for key, value in fields.items():
+            setattr(event, key, value)
+
+        if self._fallback:
+            self._fallback(event)
+
+    def decay_batch(self, batch):
+        """
+        Decay particles in an :class:`chromo.common.EventBatch` in place.
+
+        All events are processed together. The decay products of each event are
+        appended to the particles of that event. Only the supported particles are
+        decayed, the Pythia8 fallback is not used.
+
+        Parameters:
+            batch (EventBatch): Batch of events.
+        """
+        offsets = batch.offsets
+        n = offsets[-1]
+        if n == 0:
+            return
+        fields = {key: getattr(batch, key) for key in _fields}
+        group = np.repeat(np.arange(len(offsets) - 1), np.diff(offsets))
+        for key in ("mothers", "daughters"):
+            x = fields[key]
+            if x is None:
+                fields[key] = np.full((n, 2), -1, dtype=np.int64)
+            else:
+                # convert to global indices
+                start = offsets[:-1][group][:, np.newaxis]
+                fields[key] = np.where(x >= 0, x + start, -1)
+        for key in ("vx", "vy", "vz", "vt"):
+            if fields[key] is None:
+                fields[key] = np.zeros(n)
+        fields["_group"] = group
+        fields = self._decay(fields)
+
+        # products of the decays were appended at the end, move them to their
+        # events, keeping the order within each event
+        new_group = np.concatenate((group, fields.pop("_group")[n:]))
+        order = np.argsort(new_group, kind="stable")
+        position = np.empty_like(order)
+        position[order] = np.arange(len(order))
+        new_offsets = offsets + np.concatenate(
+            ([0], np.cumsum(np.bincount(new_group[n:], minlength=len(offsets) - 1)))
+        )
+        start = new_offsets[:-1][new_group[order]][:, np.newaxis]
+        for key, value in fields.items():
+            value = value[order]
+            if key in ("mothers", "daughters"):
+                value = np.where(value >= 0, position[np.maximum(value, 0)] - start, -1)
+            setattr(batch, key, value)
+        batch.offsets = new_offsets
+
+    def _decay(self, fields):
+        # Decays all supported unstable particles in the flat arrays and
+        # appends the products. Indices in mothers and daughters are global.
+        # The field "_group" holds the event index of each particle.
+        fields = dict(fields)
+        fields.setdefault("_group", np.zeros(len(fields["pid"]), dtype=np.int64))
+        if len(self._unstable) == 0:
+            return fields
+        # products of decays are searched again for unstable particles
+        start = 0
+        while True:
+            pid = fields["pid"][start:]
+            status = fields["status"][start:]
+            idx = np.searchsorted(self._unstable, pid)
+            idx[idx == len(self._unstable)] = 0
+            cand = np.flatnonzero((self._unstable[idx] == pid) & (status == 1)) + start
+            if len(cand) == 0:
+                break
+            start = len(fields["pid"])
+            products = self._decay_particles(fields, cand, start)
+            fields["status"] = fields["status"].copy()
+            fields["status"][cand] = 2
+            fields["daughters"] = fields["daughters"].copy()
+            fields["daughters"][cand] = products.pop("_range")
+            for key, value in products.items():
+                fields[key] = np.concatenate((fields[key], value))
+        return fields
+
+    def _decay_particles(self, fields, cand, start):
+        # Decays the particles with indices cand, returns the products, which
+        # are sorted by parent and start at index start.
+        rng = self._rng
+        pid = fields["pid"][cand]
+        rank = np.searchsorted(self._species, pid)
+        channel = np.searchsorted(self._cumulative, rank + rng.uniform(0, 1, len(pid)))
+
+        parent_m = fields["m"][cand].astype(float)
+        parent_en = fields["en"][cand].astype(float)
+        parent_p = np.transpose(
+            (fields["px"][cand], fields["py"][cand], fields["pz"][cand])
+        ).astype(float)
+
+        # use nominal mass if generated mass is below threshold
+        nominal = self._species_mass[rank]
+        parent_m = np.where(parent_m > 0.99 * nominal, parent_m, nominal)
+
+        out = {key: [] for key in ("pid", "m", "en", "p", "parent")}
+        for ch in np.unique(channel):
+            sel = np.flatnonzero(channel == ch)
+            daughters = self._daughters[ch]
+            dm = self._masses[ch]
+            m = parent_m[sel]
+            if len(daughters) == 2:
+                decay = _two_body(m, *dm, rng)
+            else:
+                decay = _three_body(m, *dm, rng)
+            for d, mi, (en, p) in zip(daughters, dm, decay):
+                en, p = _boost(en, p, parent_en[sel], parent_p[sel], m)
+                out["pid"].append(np.full(len(sel), d))
+                out["m"].append(np.full(len(sel), mi))
+                out["en"].append(en)
+                out["p"].append(p)
+                out["parent"].append(sel)
+
+        parent = np.concatenate(out["parent"])
+        order = np.argsort(parent, kind="stable")
+        parent = parent[order]
+        p = np.concatenate(out["p"])[order]
+        products = {
+            "pid": np.concatenate(out["pid"])[order],
+            "px": p[:, 0],
+            "py": p[:, 1],
+            "pz": p[:, 2],
+            "en": np.concatenate(out["en"])[order],
+            "m": np.concatenate(out["m"])[order],
+        }
+        nprod = len(parent)
+        products["status"] = np.ones(nprod, dtype=fields["status"].dtype)
+        products["charge"] = pdg2charge(products["pid"]).astype(fields["charge"].dtype)
+
+        # decay vertices from the proper lifetime, in the units of the parent
+        # vertices (mm and mm/c, like the Pythia8 decay handler)
+        t = self._species_ctau[rank] * rng.exponential(size=len(pid))
+        for key, beta in zip(("vx", "vy", "vz"), parent_p.T):
+            products[key] = (fields[key][cand] + beta / parent_m * t)[parent]
+        products["vt"] = (fields["vt"][cand] + parent_en / parent_m * t)[parent]
+
+        mothers = np.full((nprod, 2), -1, dtype=fields["mothers"].dtype)
+        mothers[:, 0] = cand[parent]
+        products["mothers"] = mothers
+        products["daughters"] = np.full((nprod, 2), -1, dtype=mothers.dtype)
+        products["_group"] = fields["_group"][cand][parent]
+
+        first = np.searchsorted(parent, np.arange(len(pid)))
+        last = np.searchsorted(parent, np.arange(len(pid)), side="right") - 1
+        products["_range"] = np.transpose((first + start, last + start))
+        return products
+
+
+_fields = (
+    "pid",
+    "status",
+    "charge",
+    "px",
+    "py",
+    "pz",
+    "en",
+    "m",
+    "vx",
+    "vy",
+    "vz",
+    "vt",
+    "mothers",
+    "daughters",
+)
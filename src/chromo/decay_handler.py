@@ -46,9 +46,19 @@ class Pythia8DecayHandler:
                     all_stable_pids.append(pentry.antiId)
                 all_stable_pids.append(pentry.id)
 
-        self.all_unstable_pids = np.array(all_unstable_pids, dtype=np.int64)
+        # sorted for fast lookup in __call__
+        self.all_unstable_pids = np.unique(np.array(all_unstable_pids, dtype=np.int64))
         self.all_stable_pids = np.array(all_stable_pids, dtype=np.int64)
 
+    def _must_decay(self, pid, status):
+        # Returns mask of final state particles which are unstable
+        unstable = self.all_unstable_pids
+        if len(unstable) == 0:
+            return np.zeros(len(pid), dtype=bool)
+        idx = np.searchsorted(unstable, pid)
+        idx[idx == len(unstable)] = 0
+        return (unstable[idx] == pid) & (status == 1)
+
     def __call__(self, event):
         """
         Decay particles in the provided `event` that are not set as `stable`.
@@ -57,6 +67,10 @@ class Pythia8DecayHandler:
         the newly produced particles through decay.
         The decayed particles have their `event.status` set to 2.
 
+        Only the particles which need to decay are put on the Pythia8 stack.
+        Their decay products are appended to the event and the indices of
+        mothers and daughters are adjusted accordingly.
+
         Parameters:
             event (Event): The event containing particles to be decayed.
         """
@@ -64,60 +78,57 @@ class Pythia8DecayHandler:
         if len(event.pid) == 0:
             return
 
-        # Save the original status of non-final particles before decay
-        # as they will become 2
-        not_final = event.status != 1
-        status = np.copy(event.status[not_final])
-
-        # Particles with negative status are not processed by Pythia
-        event.status[not_final] = -1
-
-        # Save refs to original event parameters
-        # that are not passed to Pythia8 stack
-        charge = event.charge
-        vx = event.vx
-        vy = event.vy
-        vz = event.vz
-        vt = event.vt
-
-        mothers = event.mothers if event.mothers is not None else None
-        daughters = event.daughters if event.daughters is not None else None
+        idx = np.flatnonzero(self._must_decay(event.pid, event.status))
+        if len(idx) == 0:
+            return
+        nsent = len(idx)
         init_len = len(event.pid)
 
-        # Put the event on the Pythia8 stack for decay
+        # Put the particles on the Pythia8 stack for decay
         self.pythia.event.fill(
-            event.pid, event.status, event.px, event.py, event.pz, event.en, event.m
+            event.pid[idx],
+            event.status[idx],
+            event.px[idx],
+            event.py[idx],
+            event.pz[idx],
+            event.en[idx],
+            event.m[idx],
         )
 
-        # Decay the event using Pythia8
+        # Decay the particles using Pythia8
         self.pythia.forceHadronLevel()
 
-        # Get the decayed event results from Pythia8
+        # Map indices on the Pythia8 stack to indices in the event:
+        # the particles sent come first, the decay products are appended
         pevent = self.pythia.event
-        event.pid = pevent.pid()
-        event.status = pevent.status()
-        event.charge = self.pythia.charge()
-        event.px = pevent.px()
-        event.py = pevent.py()
-        event.pz = pevent.pz()
-        event.en = pevent.en()
-        event.m = pevent.m()
-        event.vx = pevent.vx()
-        event.vy = pevent.vy()
-        event.vz = pevent.vz()
-        event.vt = pevent.vt()
-        event.mothers = np.maximum(pevent.mothers() - 1, -1)
-        event.daughters = np.maximum(pevent.daughters() - 1, -1)
-
-        # Restore the original parameters to the event
-        event.status[np.where(not_final)[0]] = status
-        event.charge[0:init_len] = charge
-        event.vx[0:init_len] = vx
-        event.vy[0:init_len] = vy
-        event.vz[0:init_len] = vz
-        event.vt[0:init_len] = vt
-
-        if mothers is not None:
-            event.mothers[0:init_len] = mothers
-        if daughters is not None:
-            event.daughters[0:init_len] = daughters
+        nnew = pevent.size - nsent
+        index_map = np.concatenate((idx, np.arange(init_len, init_len + nnew))).astype(
+            np.int32
+        )
+
+        def remap(x):
+            x = x - 1
+            return np.where(x >= 0, index_map[np.maximum(x, 0)], -1)
+
+        new = slice(nsent, None)
+        pstatus = pevent.status()
+        event.status[idx] = pstatus[:nsent]
+        for field in ("pid", "px", "py", "pz", "en", "m", "vx", "vy", "vz", "vt"):
+            value = getattr(pevent, field)()[new]
+            setattr(event, field, np.concatenate((getattr(event, field), value)))
+        event.status = np.concatenate((event.status, pstatus[new]))
+        # charge from Pythia8 is float32, keep the dtype of the event
+        charge = self.pythia.charge()[new].astype(event.charge.dtype)
+        event.charge = np.concatenate((event.charge, charge))
+
+        mothers = remap(pevent.mothers())
+        daughters = remap(pevent.daughters())
+        if event.mothers is None:
+            event.mothers = np.full((init_len, 2), -1, dtype=np.int32)
+        event.mothers = np.concatenate((event.mothers, mothers[new]))
+        if event.daughters is None:
+            event.daughters = np.full((init_len, 2), -1, dtype=np.int32)
+        else:
+            event.daughters = event.daughters.copy()
+        event.daughters[idx] = daughters[:nsent]
+        event.daughters = np.concatenate((event.daughters, daughters[new]))
@@ -0,0 +1,154 @@
+"""Glauber Monte Carlo cross sections computed in worker processes.
+
+``MCRun.cross_section(max_info=True)`` computes the cross sections of
+nucleus-nucleus collisions with a Glauber Monte Carlo integration, which runs
+on a single core and is slow for a large number of trials. DPMJET also cannot
+generate events afterwards. The function :func:`cross_section` splits the
+trials into batches, which are computed by independent worker processes,
+combines their results, estimates the statistical uncertainty from the spread
+of the batches, and stores the result on disk. The generator of the caller is not touched.
+
+Example::
+
+    from chromo.glauber import cross_section
+
+    kin = chromo.kinematics.CenterOfMass(1 * TeV, "O", "N")
+
+    if __name__ == "__main__":
+        value, error = cross_section(chromo.models.QGSJetII04, kin, 10000)
+"""
+
+import dataclasses
+import hashlib
+import multiprocessing as mp
+import os
+
+import numpy as np
+
+from chromo.common import CrossSectionData
+from chromo.util import (
+    _child_seeds,
+    _cross_section_key,
+    _data_dir,
+    _receive,
+    _split,
+    _WorkerError,
+)
+
+__all__ = ("cross_section",)
+
+
+def _worker(conn, Model, evt_kin, batches, seed, kwargs):
+    # computes the batches of trials one after another
+    try:
+        generator = Model(evt_kin, seed=seed, **kwargs)
+        values = []
+        for trials in batches:
+            generator.glauber_trials = trials
+            cs = generator.cross_section(max_info=True)
+            values.append(dataclasses.astuple(cs))
+        conn.send(values)
+    except Exception as exc:  # noqa: BLE001, reported to the parent
+        conn.send(_WorkerError(exc))
+    finally:
+        conn.close()
+
+
+def _combine(values, trials):
+    """Return mean and standard error of the mean from batch results.
+
+    The results of the batches are weighted with their number of trials. The
+    error is estimated from the spread of the batches and is NaN for a single
+    batch.
+    """
+    values = np.asarray(values, dtype=float)
+    w = np.asarray(trials, dtype=float)[:, np.newaxis]
+    n = w.sum()
+    mean = np.sum(w * values, axis=0) / n
+    k = len(values)
+    if k < 2:
+        return mean, np.full_like(mean, np.nan)
+    var = np.sum(w * (values - mean) ** 2, axis=0) / ((k - 1) * n)
+    return mean, np.sqrt(var)
+
+
+def _cache_path(Model, evt_kin, trials):
+    key = (Model.label, _cross_section_key(evt_kin), int(trials))
+    h = hashlib.sha1(repr(key).encode()).hexdigest()[:16]
+    return _data_dir("glauber") / f"{Model.label}_{h}.npz"
+
+
+def cross_section(
+    Model, evt_kin, trials=1000, *, workers=None, seed=None, cache=True, **kwargs
+):
+    """Compute nuclear cross sections with a parallel Glauber integration.
+
+    Parameters
+    ----------
+    Model : subclass of MCRun
+        Model class with a ``glauber_trials`` attribute, e.g.
+        :class:`chromo.models.QGSJetII04` or :class:`chromo.models.DpmjetIII193`.
+    evt_kin : EventKinematics
+        Kinematics of the collisions.
+    trials : int, optional
+        Total number of trials of the Glauber integration (default is 1000).
+    workers : int, optional
+        Number of worker processes. Default is the number of CPUs. The trials
+        are split into one batch per worker, but at least two batches, so that
+        the uncertainty can be estimated with a single worker.
+    seed : int or None, optional
+        Seed of the parent SeedSequence, see :func:`chromo.parallel.generate`.
+    cache : bool, optional
+        If True (default), results are loaded from and stored in the data
+        directory of chromo, keyed by model, beams, energy and trials.
+    **kwargs :
+        Further keyword arguments are passed to the model constructor.
+
+    Returns
+    -------
+    value, error : CrossSectionData
+        Cross sections in mb and their statistical uncertainties.
+    """
+    if not hasattr(Model, "glauber_trials"):
+        raise ValueError(
+            f"{Model.__name__} does not support a Glauber integration with a "
+            "configurable number of trials"
+        )
+    path = _cache_path(Model, evt_kin, trials) if cache else None
+    if path is not None and path.exists():
+        with np.load(path) as data:
+            return CrossSectionData(*data["value"]), CrossSectionData(*data["error"])
+
+    workers = workers or os.cpu_count() or 1
+    workers = max(1, min(workers, trials))
+    counts = _split(trials, max(workers, min(trials, 2)))
+    batches = [counts[i::workers] for i in range(workers)]
+
+    ctx = mp.get_context("spawn")
+    procs = []
+    conns = []
+    try:
+        for batch, child_seed in zip(batches, _child_seeds(seed, workers)):
+            recv, send = ctx.Pipe(duplex=False)
+            p = ctx.Process(
+                target=_worker,
+                args=(send, Model, evt_kin, batch, child_seed, kwargs),
+                daemon=True,
+            )
+            p.start()
+            send.close()
+            procs.append(p)
+            conns.append(recv)
+        values = [v for i, conn in enumerate(conns) for v in _receive(conn, i)]
+    finally:
+        for conn in conns:
+            conn.close()
+        for p in procs:
+            if p.is_alive():
+                p.terminate()
+            p.join()
+
+    value, error = _combine(values, [c for batch in batches for c in batch])
+    if path is not None:
+        np.savez(path, value=value, error=error)
+    return CrossSectionData(*value), CrossSectionData(*error)
@@ -16,6 +16,8 @@ from chromo.util import (
 from chromo.constants import nucleon_mass, MeV, GeV, TeV, PeV, EeV
 from chromo.util import CompositeTarget, EventFrame
 from particle import PDGID
+import copy
+import math
 import dataclasses
 from typing import Union, Tuple
 from types import SimpleNamespace
@@ -39,6 +41,33 @@ __all__ = (
 )
 
 
+def _boost_z(en, pz, gamma, betagamma):
+    # Boosts energies and z-momenta in place. A single-pass loop replaces this
+    # if numba is available.
+    tmp = betagamma * en
+    en *= gamma
+    en += betagamma * pz
+    pz *= gamma
+    pz += tmp
+
+
+try:
+    # accelerate with numba if numba is available, the compiled
+    # kernel is cached on disk to avoid compiling it in each process
+    import numba as nb
+
+    @nb.njit(cache=True)
+    def _boost_z(en, pz, gamma, betagamma):
+        for i in range(len(en)):
+            e = en[i]
+            p = pz[i]
+            en[i] = gamma * e + betagamma * p
+            pz[i] = betagamma * e + gamma * p
+
+except ModuleNotFoundError:
+    pass
+
+
 @dataclasses.dataclass
 class EventKinematicsBase:
     """Handles kinematic variables and conversions between reference frames.
@@ -86,29 +115,59 @@ class EventKinematicsBase:
     _gamma_cm: float
     _betagamma_cm: float
 
+    # (gamma, betagamma) of boosts by (generator frame, inverse), see _boost
+    _boost_cache = None
+
+    def _frame_boost(self, frame):
+        # Returns gamma and beta*gamma of the boost from the center-of-mass frame
+        # into frame. The beams are always collinear with the z-axis, so no
+        # rotation is needed.
+        if frame == EventFrame.CENTER_OF_MASS:
+            return 1.0, 0.0
+        if frame == self.frame:
+            s = self.beams[0] + self.beams[1]
+            return s[3] / self.ecm, s[2] / self.ecm
+        if frame == EventFrame.FIXED_TARGET and not np.isnan(self.plab):
+            # massless kinematics have no fixed-target frame
+            return self._gamma_cm, self._betagamma_cm
+        raise NotImplementedError(f"Boosts into {frame} are not supported")
+
+    def _boost(self, generator_frame, inverse):
+        # Returns gamma and beta*gamma of the boost from generator_frame into the
+        # frame of the kinematics, computed once per kinematics.
+        cache = self._boost_cache
+        if cache is None:
+            cache = self._boost_cache = {}
+        key = (generator_frame, inverse)
+        if key not in cache:
+            g1, bg1 = self._frame_boost(generator_frame)
+            g2, bg2 = self._frame_boost(self.frame)
+            # inverse of boost into generator frame followed by boost into frame
+            g = g1 * g2 - bg1 * bg2
+            bg = g1 * bg2 - bg1 * g2
+            cache[key] = (g, -bg if inverse else bg)
+        return cache[key]
+
     def apply_boost(self, event, generator_frame, inverse=False):
+        """Boost energies and z-momenta of event in place.
+
+        Parameters
+        ----------
+        event : EventData or EventBatch
+            Object with arrays ``en`` and ``pz``.
+        generator_frame : EventFrame
+            Frame of the event. It is boosted into the frame of the kinematics.
+        inverse : bool, optional
+            If True, boost from the frame of the kinematics into generator_frame.
+        """
         if generator_frame == self.frame:
             return
-        CMS = EventFrame.CENTER_OF_MASS
-        FT = EventFrame.FIXED_TARGET
-        if generator_frame == FT and self.frame == CMS:
-            bg = -self._betagamma_cm
-        elif generator_frame == CMS and self.frame == FT:
-            bg = self._betagamma_cm
-        else:
-            raise NotImplementedError(
-                f"Boosts from {generator_frame} to {self.frame} are not yet supported"
-            )
-
-        # Inverse transformation
-        if inverse:
-            bg = -bg
-
-        g = self._gamma_cm
-        en = g * event.en + bg * event.pz
-        pz = bg * event.en + g * event.pz
-        event.en[:] = en
-        event.pz[:] = pz
+        g, bg = self._boost(generator_frame, inverse)
+        _boost_z(event.en, event.pz, g, bg)
+        # cached derived quantities of EventData depend on en and pz
+        clear_cache = getattr(event, "clear_cache", None)
+        if clear_cache is not None:
+            clear_cache()
 
     def __eq__(self, other):
         at = dataclasses.astuple(self)
@@ -335,6 +394,30 @@ class EventKinematicsWithRestframe(EventKinematicsBase):
 
         self._beam_data = None
 
+    def _with_elab(self, elab):
+        # Return a copy for fixed-target kinematics with a different lab energy.
+        # Particle lookups and input checks of __init__ are skipped.
+        assert self.frame == EventFrame.FIXED_TARGET
+        m1 = self.m1
+        m2 = self.m2
+        if not (elab > m1):
+            raise ValueError("projectile energy > projectile mass required")
+        plab = energy2momentum(elab, m1)
+        ecm = elab2ecm(elab, m1, m2)
+        kin = copy.copy(self)
+        kin.elab = elab
+        kin.ekin = elab - m1
+        kin.plab = plab
+        kin.ecm = ecm
+        s = ecm**2
+        kin.pcm = math.sqrt((s - (m1 + m2) ** 2) * (s - (m1 - m2) ** 2)) / (2 * ecm)
+        kin.beams = (np.array([0, 0, plab, elab]), np.array([0, 0, 0, m2]))
+        kin._gamma_cm = (elab + m2) / ecm
+        kin._betagamma_cm = plab / ecm
+        kin._beam_data = None
+        kin._boost_cache = None
+        return kin
+
 
 class EventKinematicsMassless(EventKinematicsBase):
     """EventKinematics for massless particles."""
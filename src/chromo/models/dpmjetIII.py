@@ -1,5 +1,5 @@
 from chromo.common import MCRun, MCEvent, CrossSectionData
-from chromo.kinematics import EventFrame
+from chromo.kinematics import EventFrame, CompositeTarget
 from chromo.util import (
     info,
     _cached_data_dir,
@@ -36,6 +36,8 @@ class DpmjetIIIEvent(MCEvent):
         beam = self.kin._get_beam_data(self._generator_frame)
         for field in ["pid", "status", "charge", "px", "py", "pz", "en", "m"]:
             event_field = getattr(self, field)
+            if event_field is None:
+                continue
             event_field[0:2] = beam[field]
 
     def _prepare_for_hepmc(self):
@@ -87,6 +89,8 @@ class DpmjetIIIRun(MCRun):
     _ecm_min = 1 * GeV
     _max_A1 = 0
     _max_A2 = 0
+    _emulsion = ()  # (A, Z) of target components initialized in dt_init
+    _kkmat = 1
 
     def __init__(self, evt_kin, *, seed=None):
         import chromo
@@ -189,9 +193,9 @@ class DpmjetIIIRun(MCRun):
             kin.p2.is_nucleus and kin.p2.A > 1
         ):
             glxs = self._lib.dtglxs
-
+            i = self._material_index(kin.p2) - 1
             return CrossSectionData(
-                prod=glxs.xspro[0, 0, 0],
+                prod=glxs.xspro[0, 0, i],
             )
         elif kin.p1 == 22 and kin.p2.A == 1:
             stot, sine, _ = self._lib.dt_siggp(photon_x, kin.virt_p1, kin.ecm, 0)
@@ -230,6 +234,8 @@ class DpmjetIIIRun(MCRun):
                 self._frame = EventFrame.CENTER_OF_MASS
             self._max_A1 = kin.p1.A or 1
             self._max_A2 = kin.p2.A or 1
+            if isinstance(kin.p2, CompositeTarget):
+                self._init_emulsion(kin.p2)
             self._lib.dt_init(
                 -1,
                 max(kin.plab, 100.0),
@@ -246,12 +252,36 @@ class DpmjetIIIRun(MCRun):
                 "Maximal initialization mass exceeded "
                 f"{kin.p1.A}/{self._max_A1}, {kin.p2.A}/{self._max_A2}"
             )
+        self._kkmat = self._material_index(kin.p2)
 
         # AF: No idea yet, but apparently this functionality was around?!
         # if hasattr(k, 'beam') and hasattr(self._lib, 'init'):
         #     self._lib.dt_setbm(k.A1, k.Z1, k.A2, k.Z2, k.beam[0], k.beam[1])
         #     print 'OK'
 
+    def _init_emulsion(self, target):
+        # DPMJET initializes the Glauber tables of all components of an
+        # emulsion in dt_init. The component is selected per event with the
+        # kkmat argument of dt_kkinc, see _material_index.
+        comp = self._lib.dtcomp
+        n = len(target.components)
+        if n > len(comp.emufra):
+            raise ValueError(
+                f"{self.label} supports at most {len(comp.emufra)} target components"
+            )
+        comp.ncompo = n
+        comp.iemuma[:n] = [c.A for c in target.components]
+        comp.iemuch[:n] = [c.Z for c in target.components]
+        comp.emufra[:n] = target.fractions
+        self._emulsion = tuple((c.A, c.Z) for c in target.components)
+
+    def _material_index(self, target):
+        # One-based index of the Glauber tables for the target
+        try:
+            return self._emulsion.index((target.A, target.Z)) + 1
+        except ValueError:
+            return 1
+
     def _set_stable(self, pdgid, stable):
         kc = self._lib.pycomp(pdgid)
         self._lib.pydat3.mdcy[kc - 1, 0] = not stable
@@ -269,7 +299,7 @@ class DpmjetIIIRun(MCRun):
                 else self._lib.idt_icihad(k.p1)
             ),
             k.elab,
-            kkmat=-1,
+            kkmat=-self._kkmat,
         )
         self._lib.dtevno.nevent += 1
         return not reject
@@ -65,7 +65,8 @@ class EPOSEvent(MCEvent):
     """Wrapper class around EPOS particle stack."""
 
     def _charge_init(self, npart):
-        return self._lib.charge_vect(self._lib.hepevt.idhep[:npart])
+        pid = self._lib.hepevt.idhep[:npart]
+        return self._charge_from_table(pid, self._lib.charge_vect)
 
     def _get_impact_parameter(self):
         # return self._lib.nuc3.bimp
@@ -125,6 +126,8 @@ class EPOSEvent(MCEvent):
         beam["status"][:] = bstatus
         for field, beam_field in beam.items():
             event_field = getattr(self, field)
+            if event_field is None:
+                continue
             if np.all(is_nucleus):
                 res = np.concatenate((beam_field, event_field))
             # projectile
@@ -137,6 +140,11 @@ class EPOSEvent(MCEvent):
                 )
             setattr(self, field, res)
 
+        if self.mothers is None:
+            # Reset statuses of prepended particles
+            self.status[self.status == bstatus] = 4
+            return
+
         shift = 0
         # if projectile is nucleus
         if is_nucleus[0]:
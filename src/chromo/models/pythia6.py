@@ -10,7 +10,9 @@ class PYTHIA6Event(MCEvent):
 
     def _charge_init(self, npart):
         k = self._lib.pyjets.k[:npart, 1]
-        # TODO accelerate by implementing this loop in Fortran
+        return self._charge_from_table(k, self._pychge)
+
+    def _pychge(self, k):
         return np.fromiter((self._lib.pychge(ki) / 3 for ki in k), np.double)
 
     def _repair_initial_beam(self):
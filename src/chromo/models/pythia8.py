@@ -1,6 +1,9 @@
 from chromo.common import MCRun, EventData, CrossSectionData
 from chromo.util import _cached_data_dir, name2pdg
 from os import environ
+import os
+import json
+from pathlib import Path
 import numpy as np
 from chromo.kinematics import EventFrame
 from chromo.constants import standard_projectiles
@@ -9,6 +12,25 @@ import warnings
 from typing import Collection, List
 
 
+def _load_sigfit(path):
+    # Return cached HeavyIon:SigFitDefPar values, see Pythia8._sigfit_key
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _store_sigfit(path, key, par):
+    data = _load_sigfit(path)
+    data[key] = par
+    # write to temporary file first, so that readers never see a partial file
+    tmp = path.with_suffix(f".{os.getpid()}.tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=1)
+    os.replace(tmp, path)
+
+
 class PYTHIA8Event(EventData):
     """Wrapper for Pythia8 event stack."""
 
@@ -94,7 +116,11 @@ class Pythia8(MCRun):
         + "/releases/download/zipped_data_v1.0/Pythia8_v002.zip"
     )
 
-    def __init__(self, evt_kin, *, seed=None, config=None, banner=True):
+    _variable_setup = None  # (idB, maximum eCM) if beams can be switched
+
+    def __init__(
+        self, evt_kin, *, seed=None, config=None, banner=True, variable_energy=False
+    ):
         """
 
         Parameters
@@ -106,11 +132,22 @@ class Pythia8(MCRun):
             strings, where each string is a single configuration command.
             If config is not set, 'SoftQCD:inelastic = on' is used to get the
             equivalent of other generators in chromo.
+        variable_energy: bool, optional
+            If True, Pythia is initialized with Beams:allowVariableEnergy and
+            Beams:allowIDAswitch for hadron-hadron collisions. Changing the
+            center-of-mass energy or the projectile then takes no time, as long
+            as the target does not change and the energy does not exceed the
+            energy at initialization. Otherwise, Pythia is initialized again.
+            Pythia's initialization takes longer in this mode, so it pays off
+            for energy scans and composite targets. Default is False.
         """
 
         super().__init__(seed)
+        self._variable_energy = variable_energy
 
-        datdir = _cached_data_dir(self._data_url) + "xmldoc"
+        datdir = _cached_data_dir(self._data_url)
+        self._sigfit_file = Path(datdir) / "sigfit.json"
+        datdir += "xmldoc"
 
         # Must delete PYTHIA8DATA from environ if it exists, since it overrides
         # our argument here. When you install Pythia8 with conda, it sets
@@ -152,6 +189,10 @@ class Pythia8(MCRun):
 
     def _cross_section(self, kin=None, max_info=False):
         st = self._pythia.info.sigmaTot
+        if self._variable_setup is not None:
+            # sigmaTot is only updated by next() after switching beams
+            kin = self.kinematics if kin is None else kin
+            st.calc(int(kin.p1), int(kin.p2), kin.ecm)
         return CrossSectionData(
             total=st.sigmaTot,
             inelastic=st.sigmaTot - st.sigmaEl,
@@ -163,6 +204,9 @@ class Pythia8(MCRun):
         )
 
     def _set_kinematics(self, kin):
+        if self._switch_beams(kin):
+            return
+
         config = self._config[:]
 
         # TODO use numpy PRNG instead of Pythia's
@@ -173,6 +217,7 @@ class Pythia8(MCRun):
             "Next:numberCount = 0",
         ]
 
+        sigfit_key = None
         if (kin.p1.A or 0) > 1 or (kin.p2.A or 1) > 1:
             import warnings
 
@@ -181,9 +226,15 @@ class Pythia8(MCRun):
                 RuntimeWarning,
             )
 
-            # speed-up initialization by not fitting nuclear cross-section
-            config.append("HeavyIon:SigFitNGen = 0")
-            config.append("HeavyIon:SigFitDefPar = 10.79,1.75,0.30,0.0,0.0,0.0,0.0,0.0")
+            # the fit of the nuclear cross-section is slow, use cached result
+            sigfit_key = self._sigfit_key(kin)
+            if sigfit_key is not None:
+                par = _load_sigfit(self._sigfit_file).get(sigfit_key)
+                if par is not None:
+                    par = ",".join(str(x) for x in par)
+                    config.append("HeavyIon:SigFitNGen = 0")
+                    config.append(f"HeavyIon:SigFitDefPar = {par}")
+                    sigfit_key = None
 
         config += [
             f"Beams:idA = {int(kin.p1)}",
@@ -191,7 +242,41 @@ class Pythia8(MCRun):
             f"Beams:eCM = {kin.ecm}",
         ]
 
+        variable = self._variable_energy and kin.p1.is_hadron and kin.p2.is_hadron
+        if variable:
+            config += [
+                "Beams:allowVariableEnergy = on",
+                "Beams:allowIDAswitch = on",
+            ]
+
+        self._variable_setup = None
         self._init_pythia(config)
+        if sigfit_key is not None:
+            # init() has run the fit, which updates SigFitDefPar
+            par = self._pythia.settings.pvec("HeavyIon:SigFitDefPar")
+            _store_sigfit(self._sigfit_file, sigfit_key, par.tolist())
+        if variable:
+            # energy at initialization is the maximum energy
+            self._variable_setup = (int(kin.p2), kin.ecm)
+
+    def _sigfit_key(self, kin):
+        # Fit parameters are cached per beams and energy bin, 10 bins per decade.
+        # No caching if the user configures the fit.
+        if any(line.startswith("HeavyIon:SigFit") for line in self._config):
+            return None
+        ebin = int(np.round(10 * np.log10(kin.ecm)))
+        return f"{int(kin.p1)},{int(kin.p2)},{ebin}"
+
+    def _switch_beams(self, kin):
+        # Change projectile and energy without initialization, if possible
+        if self._variable_setup is None:
+            return False
+        id_b, ecm_max = self._variable_setup
+        if int(kin.p2) != id_b or kin.ecm > ecm_max or not kin.p1.is_hadron:
+            return False
+        pythia = self._pythia
+        # setBeamIDs fails for projectiles not supported by the ID switch
+        return pythia.setBeamIDs(int(kin.p1), id_b) and pythia.setKinematics(kin.ecm)
 
     def _init_pythia(self, config):
         pythia = self._pythia
@@ -6,6 +6,14 @@ from chromo.util import _cached_data_dir, Nuclei
 from particle import literals as lp
 
 
+def _linear_interp(x, xp, fp):
+    # like np.interp, but extrapolates linearly with the outermost segments
+    i = np.clip(np.searchsorted(xp, x), 1, len(xp) - 1)
+    x0 = xp[i - 1]
+    y0 = fp[i - 1]
+    return y0 + (x - x0) * (fp[i] - y0) / (xp[i] - x0)
+
+
 class QGSJET1Event(MCEvent):
     """Wrapper class around QGSJet HEPEVT converter."""
 
@@ -19,6 +27,8 @@ class QGSJET1Event(MCEvent):
 
     def _repair_initial_beam(self):
         self._prepend_initial_beam()
+        if self.mothers is None:
+            return
         # Repair history
         self.mothers[(self.mothers == [1, 1]).all(axis=1)] = [0, 1]
         # Set [i, i] to [i, -1]
@@ -54,6 +64,8 @@ class QGSJetRun(MCRun):
         lun = 6  # stdout
         datdir = _cached_data_dir(self._data_url)
         self._lib.cqgsini(datdir, lun, chromo.debug_level)
+        # cached cross sections, see _tabulated_cross_section
+        self._cross_section_tables = {}
 
         self.kinematics = evt_kin
         self._set_final_state_particles()
@@ -69,43 +81,45 @@ class QGSJet1Run(QGSJetRun):
     QGSJET-01c legacy event generators."""
 
     _event_class = QGSJET1Event
+    # lab energy grid of xsect.gsect
+    _log_energy_grid = np.log(10.0 ** np.arange(1, 11))
 
-    def _tabulated_cross_section(self, kin=None):
+    def _tabulated_cross_section(self, kin=None, *, elab=None):
         # Interpolation routine for QGSJET01D cross sections from CORSIKA.
-        from scipy.interpolate import UnivariateSpline
-
+        # Accepts an array of lab energies to override kin.elab.
         kin = self.kinematics if kin is None else kin
+        elab = np.asarray(kin.elab if elab is None else elab, dtype=float)
         if kin.p1.A is not None and kin.p1.A > 1:
-            return CrossSectionData(prod=self._lib.sectnu(kin.elab, kin.p1.A, kin.p2.A))
+            prod = np.reshape(
+                [self._lib.sectnu(e, kin.p1.A, kin.p2.A) for e in elab.flat],
+                elab.shape,
+            )
+            return CrossSectionData(prod=prod[()])
 
-        A_target = kin.p2.A
         # Projectile ID-1 to access fortran indices directly
         icz = self._projectile_id - 1
-        qgsgrid = 10 ** np.arange(1, 11)
-        cross_section = np.zeros(10)
-        wa = np.zeros(3)
-        for je in range(10):
-            sectn = 0.0
-
-            ya = A_target
-
-            ya = np.log(ya) / 1.38629 + 1.0
+        log_cross_section = self._log_cross_section_table(icz, kin.p2.A)
+        prod = np.exp(
+            _linear_interp(np.log(elab), self._log_energy_grid, log_cross_section)
+        )
+        return CrossSectionData(prod=prod[()])
+
+    def _log_cross_section_table(self, icz, A_target):
+        # Log of cross sections on _log_energy_grid, interpolated in the target
+        # mass from xsect.gsect, which is filled by cqgsini
+        key = (icz, A_target)
+        table = self._cross_section_tables.get(key)
+        if table is None:
+            ya = np.log(A_target) / 1.38629 + 1.0
             ja = min(int(ya), 2)
+            wa = np.empty(3)
             wa[1] = ya - ja
             wa[2] = wa[1] * (wa[1] - 1) * 0.5
             wa[0] = 1.0 - wa[1] + wa[2]
             wa[1] = wa[1] - 2.0 * wa[2]
-            sectn = sum(
-                [self._lib.xsect.gsect[je, icz, ja + m - 1] * wa[m] for m in range(3)]
-            )
-            cross_section[je] = np.exp(sectn)
-
-        spl = UnivariateSpline(
-            np.log(qgsgrid), np.log(cross_section), ext="extrapolate", s=0, k=1
-        )
-
-        prod = np.exp(spl(np.log(kin.elab)))
-        return CrossSectionData(prod=prod)
+            table = self._lib.xsect.gsect[:, icz, ja - 1 : ja + 2] @ wa
+            self._cross_section_tables[key] = table
+        return table
 
     def _cross_section(self, kin=None, max_info=False):
         """
@@ -204,10 +218,15 @@ class QGSJet2Run(QGSJetRun):
 
     _event_class = QGSJET2Event
 
-    def _tabulated_cross_section(self, kin=None):
+    def _tabulated_cross_section(self, kin=None, *, elab=None):
         """Tabulated inelastic or production cross section for
-        QGSJET-II-xx event generators."""
+        QGSJET-II-xx event generators.
+
+        An array of lab energies can be passed to override kin.elab. Results
+        of qgsect are memoized, since scans call it many times.
+        """
         kin = self.kinematics if kin is None else kin
+        elab = np.asarray(kin.elab if elab is None else elab, dtype=float)
         projectile_id = {
             lp.pi_plus.pdgid: 1,
             lp.K_plus.pdgid: 3,
@@ -216,13 +235,17 @@ class QGSJet2Run(QGSJetRun):
         }.get(
             abs(kin.p1), 2
         )  # 2 is correct for nuclei
-        prod = self._lib.qgsect(
-            kin.elab,
-            projectile_id,
-            kin.p1.A or 1,
-            kin.p2.A,
-        )
-        return CrossSectionData(prod=prod)
+        args = (projectile_id, kin.p1.A or 1, kin.p2.A)
+        tables = self._cross_section_tables
+        if len(tables) >= 4096:
+            tables.clear()
+        prod = np.empty(elab.shape)
+        for i, e in enumerate(elab.flat):
+            value = tables.get((e,) + args)
+            if value is None:
+                value = tables[(e,) + args] = self._lib.qgsect(e, *args)
+            prod.flat[i] = value
+        return CrossSectionData(prod=prod[()])
 
     def _cross_section(self, kin=None, max_info=False):
         """
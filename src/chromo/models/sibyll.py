@@ -131,6 +131,8 @@ class SibyllEvent(MCEvent):
 
     def _repair_initial_beam(self):
         self._prepend_initial_beam()
+        if self.mothers is None:
+            return
         # Repair history
         self.mothers[(self.mothers == [1, 1]).all(axis=1)] = [0, 1]
         # Set [i, i] to [i, -1]
@@ -270,6 +272,12 @@ class SIBYLLRun(MCRun):
         self._production_id = self._lib.isib_pdg2pid(kin.p1)
         assert self._production_id != 0
 
+    def _switch_component(self, kin):
+        # the target mass and the energy are passed to sibyll in _generate
+        self._kinematics = kin
+
+    _switch_energy = _switch_component
+
     def _set_stable(self, pdgid, stable):
         if pdgid not in self._unstable_pids:
             return
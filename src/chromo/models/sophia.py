@@ -89,6 +89,8 @@ class SophiaEvent(MCEvent):
 
     def _repair_initial_beam(self):
         self._prepend_initial_beam()
+        if self.mothers is None:
+            return
         # Repair history
         # Make second mother = -1
         self.mothers[:, 1] = -1
@@ -148,6 +150,11 @@ class Sophia20(MCRun):
         # setting parameters for cross-section
         self._lib.initial(self._nucleon_code)
 
+    def _switch_energy(self, evt_kin):
+        # the energy is passed to eventgen in _generate
+        self._kinematics = evt_kin
+        self._energy_of_photon = evt_kin.elab
+
     def _set_stable(self, pdgid, stable):
         if pdgid not in self._unstable_pids:
             return
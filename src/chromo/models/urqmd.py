@@ -34,6 +34,8 @@ class UrQMDEvent(MCEvent):
 
     def _repair_initial_beam(self):
         self._prepend_initial_beam()
+        if self.mothers is None:
+            return
         # Repair history
         self.mothers[(self.mothers == [1, 1]).all(axis=1)] = [0, 1]
         # Set [i, i] to [i, -1]
@@ -0,0 +1,500 @@
+"""Generate events with one model in several worker processes.
+
+The Fortran models can only be initialized once per process, see
+:meth:`chromo.common.MCRun._abort_if_already_initialized`. A single
+:class:`chromo.common.MCRun` instance therefore always runs on one core.
+The functions in this module work around this limitation by starting
+independent worker processes, each with its own generator instance and
+its own stream of random numbers.
+
+Example::
+
+    import chromo
+    from chromo.parallel import generate
+
+    kin = chromo.kinematics.CenterOfMass(13 * chromo.constants.TeV, "p", "p")
+
+    if __name__ == "__main__":
+        for event in generate(chromo.models.Sibyll23d, kin, 10000, workers=8):
+            ...
+
+The ``if __name__ == "__main__"`` guard is required, since the workers are
+started with the "spawn" method, which imports the main module again.
+
+With ``shared_memory=capacity``, the particles of the events are not pickled,
+but written by each worker into a ring buffer in shared memory, which holds
+``capacity`` particles. The events returned to the caller are views into the
+shared memory, which are released when the next event is requested.
+
+With ``fork=True``, the model is initialized only once in a server process,
+which then forks the workers. The workers share the memory of the initialized
+model and only replace its random number generator. This saves time and memory
+for models with a slow initialization, like EPOS, DPMJet and QGSJet.
+"""
+
+import io
+import multiprocessing as mp
+import os
+import pickle
+import signal
+import struct
+import sys
+from multiprocessing import resource_tracker
+from multiprocessing.connection import wait
+from multiprocessing.shared_memory import SharedMemory
+
+import numpy as np
+
+from chromo.common import EventData
+from chromo.kinematics import EventKinematicsBase
+from chromo.util import (
+    _child_seeds,
+    _receive,
+    _split,
+    _WorkerError,
+)
+
+__all__ = ("generate",)
+
+
+class _Sender:
+    """Sends objects over a connection with pickle protocol 5.
+
+    The arrays of events are sent as out-of-band buffers, which are written
+    to the connection without copying them into the pickle stream. The
+    kinematics are sent only when they differ from those of the previous event.
+    """
+
+    def __init__(self, conn):
+        self.conn = conn
+        self._kin = None
+        self._kin_key = 0
+
+    def _persistent_id(self, obj):
+        if not isinstance(obj, EventKinematicsBase):
+            return None
+        if obj is self._kin:
+            return (self._kin_key, None)
+        self._kin = obj
+        self._kin_key += 1
+        return (self._kin_key, pickle.dumps(obj, protocol=5))
+
+    def send(self, obj):
+        buffers = []
+        f = io.BytesIO()
+        p = pickle.Pickler(f, protocol=5, buffer_callback=buffers.append)
+        p.persistent_id = self._persistent_id
+        p.dump(obj)
+        buffers = [b.raw() for b in buffers]
+        sizes = [b.nbytes for b in buffers]
+        self.conn.send_bytes(struct.pack(f"<{len(sizes) + 1}q", len(sizes), *sizes))
+        self.conn.send_bytes(f.getbuffer())
+        for b in buffers:
+            self.conn.send_bytes(b)
+
+
+class _Receiver:
+    """Receives objects sent by :class:`_Sender`."""
+
+    def __init__(self, conn):
+        self.conn = conn
+        self._kin = None
+
+    def _persistent_load(self, pid):
+        key, data = pid
+        if data is not None:
+            self._kin = (key, pickle.loads(data))
+        assert self._kin[0] == key
+        return self._kin[1]
+
+    def recv(self):
+        header = self.conn.recv_bytes()
+        n = struct.unpack_from("<q", header)[0]
+        sizes = struct.unpack_from(f"<{n}q", header, 8)
+        data = self.conn.recv_bytes()
+        buffers = []
+        for size in sizes:
+            # writable memory, so that the arrays of the events are writable
+            b = bytearray(size)
+            self.conn.recv_bytes_into(b)
+            buffers.append(b)
+        u = pickle.Unpickler(io.BytesIO(data), buffers=buffers)
+        u.persistent_load = self._persistent_load
+        return u.load()
+
+
+# name and shape per particle of the columns of _SharedRing
+_ring_fields = (
+    ("pid", ()),
+    ("status", ()),
+    ("charge", ()),
+    ("px", ()),
+    ("py", ()),
+    ("pz", ()),
+    ("en", ()),
+    ("m", ()),
+    ("vx", ()),
+    ("vy", ()),
+    ("vz", ()),
+    ("vt", ()),
+    ("mothers", (2,)),
+    ("daughters", (2,)),
+)
+# bytes per value in the columns, the largest supported itemsize
+_ring_itemsize = 8
+
+
+class _Record:
+    """Event stored in a _SharedRing, which is sent instead of the event."""
+
+    def __init__(self, event, start, dtypes):
+        self.start = start
+        self.size = len(event)
+        self.generator = event.generator
+        self.kin = event.kin
+        self.nevent = event.nevent
+        self.impact_parameter = event.impact_parameter
+        self.n_wounded = event.n_wounded
+        self.production_cross_section = event.production_cross_section
+        # dtype of each field, None if the field is None
+        self.dtypes = dtypes
+
+
+class _SharedRing:
+    """Ring buffer for the particles of events in shared memory.
+
+    The worker writes the particles of each event into a contiguous range of
+    columns, the consumer reads them as views and releases the ranges in the
+    order in which they were written. The columns have room for 8 bytes per
+    value, the dtypes of the fields of each event are kept in its _Record, so
+    that e.g. single precision events are not converted. The memory starts
+    with two counters, the total number of particles written and released. The
+    worker waits on a condition for the consumer to release enough space.
+    """
+
+    def __init__(self, capacity, name=None, condition=None):
+        self.capacity = capacity
+        # must be created with the spawn context to be passed to the workers
+        self._condition = condition or mp.get_context("spawn").Condition()
+        size = 16 + capacity * _ring_itemsize * sum(
+            int(np.prod(shape)) for (_, shape) in _ring_fields
+        )
+        if name is None:
+            self.shm = SharedMemory(create=True, size=size)
+        else:
+            self.shm = _attach(name)
+        self._counters = np.ndarray(2, np.int64, self.shm.buf)
+        self._columns = {}
+        offset = self._counters.nbytes
+        for key, shape in _ring_fields:
+            self._columns[key] = (offset, shape)
+            offset += capacity * _ring_itemsize * int(np.prod(shape))
+
+    def _array(self, key, dtype):
+        offset, shape = self._columns[key]
+        return np.ndarray((self.capacity,) + shape, dtype, self.shm.buf, offset)
+
+    @property
+    def name(self):
+        return self.shm.name
+
+    @property
+    def args(self):
+        """Arguments to attach to the ring in a worker."""
+        return self.capacity, self.name, self._condition
+
+    def write(self, event):
+        """Write event and return a _Record, or None if the event does not fit."""
+        n = len(event)
+        cap = self.capacity
+        dtypes = {}
+        for key, _ in _ring_fields:
+            x = getattr(event, key)
+            dtypes[key] = None if x is None else x.dtype
+        if n > cap or any(
+            d is not None and d.itemsize > _ring_itemsize for d in dtypes.values()
+        ):
+            return None
+        start = int(self._counters[0])
+        pos = start % cap
+        if pos + n > cap:
+            # events are contiguous, skip the rest of the ring
+            start += cap - pos
+            pos = 0
+        # wait until the consumer released enough space
+        with self._condition:
+            self._condition.wait_for(lambda: start + n - self._counters[1] <= cap)
+        sel = slice(pos, pos + n)
+        for key, dtype in dtypes.items():
+            if dtype is not None:
+                self._array(key, dtype)[sel] = getattr(event, key)
+        self._counters[0] = start + n
+        return _Record(event, start, dtypes)
+
+    def view(self, record):
+        """Return EventData with views into the ring."""
+        pos = record.start % self.capacity
+        sel = slice(pos, pos + record.size)
+        fields = {
+            key: None if dtype is None else self._array(key, dtype)[sel]
+            for (key, dtype) in record.dtypes.items()
+        }
+        return EventData(
+            generator=record.generator,
+            kin=record.kin,
+            nevent=record.nevent,
+            impact_parameter=record.impact_parameter,
+            n_wounded=record.n_wounded,
+            production_cross_section=record.production_cross_section,
+            **fields,
+        )
+
+    def release(self, record):
+        """Release the memory of the record and all records before it."""
+        with self._condition:
+            self._counters[1] = record.start + record.size
+            self._condition.notify()
+
+    def close(self, unlink=False):
+        self._counters = None
+        try:
+            self.shm.close()
+        except BufferError:
+            # views are still referenced by the caller, the memory is
+            # unmapped when they are deleted
+            pass
+        if unlink:
+            self.shm.unlink()
+
+
+def _attach(name):
+    # Attach to existing shared memory without registering it with the
+    # resource tracker, which would otherwise unlink it or warn about a leak
+    # when the worker exits. Unregistering after the fact is not an option
+    # before Python 3.13, since the tracker is shared with the parent, whose
+    # registration would be removed.
+    if sys.version_info >= (3, 13):
+        return SharedMemory(name=name, track=False)
+    register = resource_tracker.register
+    resource_tracker.register = lambda name, rtype: None
+    try:
+        return SharedMemory(name=name)
+    finally:
+        resource_tracker.register = register
+
+
+def _worker(conn, Model, evt_kin, nevents, seed, ring, kwargs):
+    _produce(conn, lambda: Model(evt_kin, seed=seed, **kwargs), nevents, ring)
+
+
+def _forked_worker(conn, generator, nevents, seed, ring, siblings):
+    # The write ends of the workers forked later are inherited, they must be
+    # closed or the parent sees no EOF when one of those workers dies.
+    for sibling in siblings:
+        sibling.close()
+
+    def make_generator():
+        generator._reseed(seed)
+        return generator
+
+    _produce(conn, make_generator, nevents, ring)
+
+
+def _fork_server(conns, Model, evt_kin, counts, seeds, rings, seed, kwargs):
+    # Initializes the model once and forks the workers, which share the
+    # memory of the initialized model copy-on-write.
+    try:
+        generator = Model(evt_kin, seed=seed, **kwargs)
+        if not hasattr(generator._lib, "npy"):
+            raise ValueError(
+                f"{Model.__name__} does not use the numpy random generator "
+                "and cannot be reseeded in forked workers"
+            )
+    except Exception as exc:  # noqa: BLE001, reported to the parent
+        for conn in conns:
+            _Sender(conn).send(_WorkerError(exc))
+            conn.close()
+        return
+
+    # on terminate, exit normally to terminate the daemonic workers
+    signal.signal(signal.SIGTERM, lambda *args: sys.exit(1))
+    ctx = mp.get_context("fork")
+    procs = []
+    for i, (conn, count, child_seed, ring) in enumerate(
+        zip(conns, counts, seeds, rings)
+    ):
+        p = ctx.Process(
+            target=_forked_worker,
+            args=(conn, generator, count, child_seed, ring, conns[i + 1 :]),
+            daemon=True,
+        )
+        p.start()
+        conn.close()
+        procs.append(p)
+    for p in procs:
+        p.join()
+
+
+def _produce(conn, make_generator, nevents, ring):
+    sender = _Sender(conn)
+    if ring is not None:
+        ring = _SharedRing(*ring)
+    try:
+        generator = make_generator()
+        for event in generator(nevents):
+            record = ring.write(event) if ring is not None else None
+            # MCEvent is pickled as EventData
+            sender.send(event if record is None else record)
+        sender.send(None)
+    except Exception as exc:  # noqa: BLE001, reported to the parent
+        sender.send(_WorkerError(exc))
+    finally:
+        if ring is not None:
+            ring.close()
+        conn.close()
+
+
+def _ordered(conns):
+    # round-robin over workers, the sequence of events is reproducible
+    active = [(i, _Receiver(conn)) for i, conn in enumerate(conns)]
+    while active:
+        for index, conn in active[:]:
+            event = _receive(conn, index)
+            if event is None:
+                active.remove((index, conn))
+                continue
+            yield index, event
+
+
+def _unordered(conns):
+    # yield events in the order in which they arrive
+    index = {conn: i for i, conn in enumerate(conns)}
+    receivers = {conn: _Receiver(conn) for conn in conns}
+    active = list(conns)
+    while active:
+        for conn in wait(active):
+            event = _receive(receivers[conn], index[conn])
+            if event is None:
+                active.remove(conn)
+                continue
+            yield index[conn], event
+
+
+def generate(
+    Model,
+    evt_kin,
+    nevents,
+    *,
+    workers=None,
+    seed=None,
+    ordered=True,
+    shared_memory=None,
+    fork=False,
+    **kwargs,
+):
+    """Generate events with several independent instances of a model.
+
+    Each worker process creates its own generator with a child seed taken from
+    ``np.random.SeedSequence(seed).spawn(workers)`` and generates its share of
+    the events. The events are streamed back to the calling process as
+    :class:`chromo.common.EventData` objects.
+
+    Parameters
+    ----------
+    Model : subclass of MCRun
+        Model class, e.g. :class:`chromo.models.Sibyll23d`.
+    evt_kin : EventKinematics
+        Kinematics of the collisions.
+    nevents : int
+        Total number of events.
+    workers : int, optional
+        Number of worker processes. Default is the number of CPUs.
+    seed : int or None, optional
+        Seed of the parent SeedSequence. With the same seed, number of workers
+        and ``ordered=True``, the sequence of events is reproducible.
+    ordered : bool, optional
+        If True (default), events are returned round-robin from the workers, which
+        gives a reproducible order. If False, events are returned as soon as
+        they arrive, which avoids waiting for slow workers.
+    shared_memory : int, optional
+        If set, events are transferred through a ring buffer in shared memory
+        with this capacity in particles per worker, instead of being pickled.
+        The returned events are then views into the shared memory, which are
+        only valid until the next event is requested. Use
+        :meth:`EventData.copy` to keep an event. Events which are larger than
+        the capacity are pickled.
+    fork : bool, optional
+        If True, the model is initialized once in a server process, which then
+        forks the workers, see the module documentation. This requires the
+        "fork" start method, which is not available on Windows, and a model
+        which uses the numpy random generator. Default is False.
+    **kwargs :
+        Further keyword arguments are passed to the model constructor.
+
+    Yields
+    ------
+    EventData
+    """
+    workers = workers or os.cpu_count() or 1
+    workers = max(1, min(workers, nevents))
+
+    if fork and "fork" not in mp.get_all_start_methods():
+        raise ValueError("fork=True is not supported on this platform")
+
+    counts = _split(nevents, workers)
+    seeds = _child_seeds(seed, workers)
+    ctx = mp.get_context("spawn")
+    procs = []
+    conns = []
+    rings = []
+    try:
+        ring_args = []
+        sends = []
+        for _ in range(workers):
+            ring = None
+            if shared_memory:
+                rings.append(_SharedRing(shared_memory))
+                ring = rings[-1].args
+            ring_args.append(ring)
+            recv, send = ctx.Pipe(duplex=False)
+            conns.append(recv)
+            sends.append(send)
+
+        if fork:
+            # the server must not be daemonic, since it has child processes
+            server = ctx.Process(
+                target=_fork_server,
+                args=(sends, Model, evt_kin, counts, seeds, ring_args, seed, kwargs),
+            )
+            server.start()
+            procs.append(server)
+        else:
+            for send, count, child_seed, ring in zip(sends, counts, seeds, ring_args):
+                p = ctx.Process(
+                    target=_worker,
+                    args=(send, Model, evt_kin, count, child_seed, ring, kwargs),
+                    daemon=True,
+                )
+                p.start()
+                procs.append(p)
+        # only the workers write to these ends
+        for send in sends:
+            send.close()
+
+        source = _ordered(conns) if ordered else _unordered(conns)
+        for index, item in source:
+            if isinstance(item, _Record):
+                ring = rings[index]
+                yield ring.view(item)
+                ring.release(item)
+            else:
+                yield item
+    finally:
+        for conn in conns:
+            conn.close()
+        for p in procs:
+            if p.is_alive():
+                p.terminate()
+            p.join()
+        for ring in rings:
+            ring.close(unlink=True)
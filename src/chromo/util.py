@@ -1,6 +1,5 @@
 """Utility module for auxiliary methods and classes."""
 
-import warnings
 import inspect
 import platform
 import dataclasses
@@ -8,6 +7,7 @@ import copy
 import math
 import zipfile
 import shutil
+import traceback
 from pathlib import Path
 from enum import Enum
 from typing import Sequence, Set, Tuple, Collection, Union
@@ -275,6 +275,74 @@ def pdg2name(pdgid):
         return f"Invalid({int(pdgid)})"
 
 
+# PDG IDs with absolute value below this limit are looked up in a dense table
+_charge_table_limit = 10000
+_charge_table = None
+
+
+def _make_charge_table():
+    pids = []
+    charges = []
+    for p in Particle.all():
+        pid = int(p.pdgid)
+        # nuclei are handled separately
+        if abs(pid) < 1000000000 and p.three_charge is not None:
+            pids.append(pid)
+            charges.append(p.three_charge / 3)
+    pids = np.array(pids, dtype=np.int64)
+    charges = np.array(charges)
+    n = _charge_table_limit
+    dense = np.full(2 * n + 1, np.nan)
+    small = np.abs(pids) < n
+    dense[pids[small] + n] = charges[small]
+    order = np.argsort(pids[~small])
+    return dense, pids[~small][order], charges[~small][order]
+
+
+def pdg2charge(pdgid):
+    """
+    Returns the charges for PDG IDs.
+
+    This is a vectorized lookup in a precomputed table, which is faster than
+    querying the particle database for each particle. The charges of nuclei
+    are computed from the PDG code 10LZZZAAAI.
+
+    Args:
+        pdgid (int or array of int): PDG IDs.
+
+    Returns:
+        float or array of float: Charges in units of the elementary charge. NaN
+        is returned for unknown PDG IDs.
+    """
+    global _charge_table
+    if _charge_table is None:
+        _charge_table = _make_charge_table()
+    dense, sparse_pids, sparse_charges = _charge_table
+
+    pid = np.asarray(pdgid, dtype=np.int64)
+    if pid.ndim == 0:
+        return pdg2charge(pid.reshape(1))[0]
+    n = _charge_table_limit
+    apid = np.abs(pid)
+    small = apid < n
+    result = dense[np.where(small, pid + n, 0)]
+    if np.all(small):
+        return result
+
+    # rare particles like excited mesons
+    idx = np.searchsorted(sparse_pids, pid)
+    idx[idx == len(sparse_pids)] = 0
+    found = ~small & (sparse_pids[idx] == pid)
+    result = np.where(found, sparse_charges[idx], result)
+
+    # nuclei
+    nucleus = apid >= 1000000000
+    z = np.sign(pid) * ((apid // 10000) % 1000)
+    result = np.where(nucleus, z, result)
+
+    return np.where(small | found | nucleus, result, np.nan)
+
+
 def is_AZ(arg):
     """
     Check if the input is a tuple of mass and charge number.
@@ -473,6 +541,19 @@ def _download_file(outfile, url):
 
 
 # Function to check and download dababase files on github
+def _data_dir(name=None):
+    """Returns the directory for data files, which is created if necessary.
+
+    Args:
+        name (str): optional name of a subdirectory
+    """
+    base_dir = Path(__file__).parent.absolute() / "iamdata"
+    if name:
+        base_dir = base_dir / name
+    base_dir.mkdir(parents=True, exist_ok=True)
+    return base_dir
+
+
 def _cached_data_dir(url):
     """Checks for existence of version file
     "model_name_vxxx.zip". Downloads and unpacks
@@ -482,8 +563,7 @@ def _cached_data_dir(url):
         url (str): url for zip file
     """
 
-    base_dir = Path(__file__).parent.absolute() / "iamdata"
-    base_dir.mkdir(parents=True, exist_ok=True)
+    base_dir = _data_dir()
 
     vname = Path(url).stem
     model_dir = base_dir / vname.split("_v")[0]
@@ -587,64 +667,87 @@ class classproperty:
         return self.f(owner)
 
 
-def _select_mothers(mask, mothers):
-    # This algorithm is slow in pure Python and should be
-    # speed up by compiling the logic.
+def _select_mothers_numpy(mask, mothers):
+    # Vectorized remapping of the history to the selected particles. The
+    # loop in _select_mothers_loop is equivalent and used if numba is available.
+    n = len(mothers)
+    result = mothers[mask]
 
+    # new index of each old index, -1 for removed particles
+    mapping = np.cumsum(mask) - 1
+    mapping[~mask] = -1
+
+    def remap(x):
+        res = np.full(len(x), -1, dtype=mapping.dtype)
+        ok = (x >= 0) & (x < n)
+        res[ok] = mapping[x[ok]]
+        return res
+
+    a = result[:, 0]
+    p = remap(a)
+    q = remap(result[:, 1])
+    has_mother = a != -1
+    orphan = has_mother & (p == -1)
+    moved = has_mother & (p != -1) & (p != a)
+    result[moved, 0] = p[moved]
+    result[moved, 1] = q[moved]
     # attach parentless particles to beam particles,
     # unless those are also removed
+    if n > 1 and mask[0] and mask[1]:
+        result[orphan] = (0, 1)
+    else:
+        result[orphan] = (-1, -1)
+    return result
+
+
+def _select_mothers_loop(mask, mothers):
     fallback = (-1, -1)
-    if mask[0] and mask[1]:
+    if len(mothers) > 1 and mask[0] and mask[1]:
         fallback = (0, 1)
 
     n = len(mothers)
-    indices = np.arange(n)[mask]
+    mapping = np.cumsum(mask) - 1
     result = mothers[mask]
-    mapping = {old: i for i, old in enumerate(indices)}
-
-    n = len(result)
-    for i in range(n):
+    for i in range(len(result)):
         a = result[i, 0]
         if a == -1:
             continue
-        p = mapping.get(a, -1)
+        p = mapping[a] if 0 <= a < n and mask[a] else -1
         if p == -1:
-            a, b = fallback
-            result[i, 0] = a
-            result[i, 1] = b
+            result[i, 0] = fallback[0]
+            result[i, 1] = fallback[1]
         elif p != a:
-            q = -1
             b = result[i, 1]
-            if b > -1:
-                q = mapping.get(b, -1)
+            q = mapping[b] if 0 <= b < n and mask[b] else -1
             result[i, 0] = p
             result[i, 1] = q
     return result
 
 
+_select_mothers = _select_mothers_numpy
+
+
 def select_mothers(arg, mothers):
     if mothers is None:
         return None
 
     n = len(mothers)
 
-    if isinstance(arg, np.ndarray) and arg.dtype is bool:
+    if isinstance(arg, np.ndarray) and arg.dtype == bool:
         mask = arg
     else:
         mask = np.zeros(n, dtype=bool)
         mask[arg] = True
 
-    with warnings.catch_warnings():
-        # suppress numba safety warning that we can ignore
-        warnings.simplefilter("ignore")
-        return _select_mothers(mask, mothers)
+    return _select_mothers(mask, mothers)
 
 
 try:
-    # accelerate with numba if numba is available
+    # accelerate with numba if numba is available, the compiled
+    # kernel is cached on disk to avoid compiling it in each process
     import numba as nb
 
-    _select_mothers = nb.njit(_select_mothers)
+    _select_mothers = nb.njit(cache=True)(_select_mothers_loop)
 
 except ModuleNotFoundError:
     pass
@@ -819,3 +922,57 @@ def select_long_lived(tau=0, mm=False):
             long_lived.append(pid)
 
     return long_lived
+
+
+def _cross_section_key(kin):
+    # CompositeTarget hashes like its heaviest component, use all components
+    p2 = kin.p2
+    if isinstance(p2, CompositeTarget):
+        p2 = (tuple(int(c) for c in p2.components), tuple(p2.fractions))
+    else:
+        p2 = int(p2)
+    return (int(kin.p1), p2, float(kin.ecm), kin.virt_p1, kin.virt_p2)
+
+
+# Helpers for the worker processes of chromo.parallel and chromo.glauber
+
+
+class _WorkerError:
+    """Exception raised in a worker process, transported to the parent as text."""
+
+    def __init__(self, exc):
+        self.message = "".join(
+            traceback.format_exception(type(exc), exc, exc.__traceback__)
+        )
+
+    def reraise(self, index):
+        raise RuntimeError(f"worker {index} failed:\n{self.message}")
+
+
+def _split(nevents, workers):
+    """Return number of events per worker, which add up to nevents."""
+    counts = np.full(workers, nevents // workers, dtype=np.int64)
+    counts[: nevents % workers] += 1
+    return [int(c) for c in counts]
+
+
+def _child_seeds(seed, workers):
+    """Return statistically independent integer seeds for the workers.
+
+    Integer seeds are used instead of the SeedSequence objects, because some
+    generators (e.g. Pythia8) use :attr:`MCRun.seed` to seed their internal PRNG,
+    which would be identical for all children of a SeedSequence.
+    """
+    children = np.random.SeedSequence(seed).spawn(workers)
+    return [int(c.generate_state(1, dtype=np.uint64)[0]) for c in children]
+
+
+def _receive(conn, index):
+    # conn is a Connection or any object with a recv method
+    try:
+        item = conn.recv()
+    except EOFError:
+        raise RuntimeError(f"worker {index} terminated unexpectedly")
+    if isinstance(item, _WorkerError):
+        item.reraise(index)
+    return item
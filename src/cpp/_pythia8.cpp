@@ -241,6 +241,11 @@ PYBIND11_MODULE(_pythia8, m)
 
     py::class_<Settings>(m, "Settings")
         .def("resetAll", &Settings::resetAll)
+        .def("pvec", [](Settings &self, string key)
+             {
+                 auto v = self.pvec(key);
+                 return py::array_t<double>(v.size(), v.data());
+             })
 
         ;
 
@@ -248,6 +253,10 @@ PYBIND11_MODULE(_pythia8, m)
         .def(py::init<string, bool>(), py::call_guard<py::scoped_ostream_redirect, py::scoped_estream_redirect>())
         .def("init", &Pythia::init, py::call_guard<py::scoped_ostream_redirect, py::scoped_estream_redirect>())
         .def("next", py::overload_cast<>(&Pythia::next))
+        // change beams between events, requires Beams:allowVariableEnergy and
+        // Beams:allowIDAswitch at initialization
+        .def("setKinematics", py::overload_cast<double>(&Pythia::setKinematics), "eCM"_a)
+        .def("setBeamIDs", &Pythia::setBeamIDs, "idA"_a, "idB"_a = 0)
         .def("readString", &Pythia::readString, "setting"_a, "warn"_a = true)
         .def("forceHadronLevel", &Pythia::forceHadronLevel, "find_junctions"_a = true)
         .def_readwrite("particleData", &Pythia::particleData)
@@ -1,13 +1,26 @@
-from chromo.common import CrossSectionData, EventData, MCEvent
-from chromo.kinematics import CenterOfMass, EventFrame
+from chromo.common import (
+    CrossSectionData,
+    EventData,
+    MCEvent,
+    MCRun,
+    _EventBatchBuilder,
+    _WithoutCrossSection,
+    _sample_spectrum,
+    _to_single_precision,
+)
+from chromo.kinematics import CenterOfMass, EventFrame, FixedTarget
 import numpy as np
 import dataclasses
 import pickle
 from types import SimpleNamespace
 import pytest
 from contextlib import nullcontext
-from numpy.testing import assert_equal
-from chromo.util import get_all_models
+from numpy.testing import assert_equal, assert_allclose
+from chromo.util import get_all_models, CompositeTarget
+from chromo.models import Sibyll23d
+from chromo.models.urqmd import UrQMDEvent
+from chromo.constants import GeV
+from .util import run_in_separate_process
 
 
 @pytest.fixture
@@ -141,6 +154,190 @@ def test_MCEvent_copy():
     assert evt3 == evt
 
 
+class BeamEvent(MCEvent):
+    def __init__(self, lazy, generator=None):
+        hepevt = SimpleNamespace(
+            nevhep=1,
+            nhep=3,
+            idhep=np.array([211, -211, 22, 0], dtype=np.int32),
+            isthep=np.array([1, 1, 1, 0], dtype=np.int32),
+            phep=np.arange(20, dtype=np.double).reshape(5, 4),
+            vhep=np.arange(16, dtype=np.double).reshape(4, 4),
+            jmohep=np.ones((2, 4), np.int32),
+            jdahep=np.zeros((2, 4), np.int32),
+        )
+        self.generator_ns = SimpleNamespace(
+            _lib=SimpleNamespace(hepevt=hepevt),
+            name="foo",
+            version="bar",
+            _inel_or_prod_cross_section=1.0,
+            kinematics=CenterOfMass(10, "p", "p"),
+            _frame=EventFrame.CENTER_OF_MASS,
+            _restore_beam_and_history=True,
+            lazy_events=lazy,
+            nevents=1,
+        )
+        super().__init__(generator or self.generator_ns)
+
+    def _charge_init(self, npart):
+        self.ncharge_init = getattr(self, "ncharge_init", 0) + 1
+        return np.array([1.0, -1.0, 0.0])[:npart]
+
+    def _repair_initial_beam(self):
+        self._prepend_initial_beam()
+
+
+def test_MCEvent_lazy():
+    eager = BeamEvent(False)
+    lazy = BeamEvent(True)
+    assert "charge" not in lazy.__dict__
+    assert "mothers" not in lazy.__dict__
+    assert_equal(lazy.pz, eager.pz)
+    assert_equal(lazy.charge, eager.charge)
+    assert lazy.ncharge_init == 1
+    assert_equal(lazy.charge, eager.charge)
+    assert lazy.ncharge_init == 1
+    assert "vx" not in lazy.__dict__
+    assert_equal(lazy.vy, eager.vy)
+    assert "vx" in lazy.__dict__
+
+    lazy = BeamEvent(True)
+    fs = lazy.final_state()
+    assert "charge" not in fs.__dict__
+    assert_equal(fs.pid, eager.final_state().pid)
+    assert fs.mothers is None
+    assert_equal(lazy[[0, 2]].mothers, eager[[0, 2]].mothers)
+    assert lazy == eager
+    assert pickle.loads(pickle.dumps(BeamEvent(True))) == eager
+
+    lazy = BeamEvent(True)
+    lazy.generator_ns.nevents += 1
+    with pytest.raises(RuntimeError, match="next event"):
+        _ = lazy.charge
+
+
+class UrQMDBeamEvent(UrQMDEvent, BeamEvent):
+    # the UrQMD history repairs on a fake stack
+    _charge_init = BeamEvent._charge_init
+    _get_impact_parameter = MCEvent._get_impact_parameter
+
+
+def test_MCEvent_lazy_urqmd():
+    eager = UrQMDBeamEvent(False)
+    lazy = UrQMDBeamEvent(True)
+    assert_equal(lazy.pz, eager.pz)
+    assert_equal(lazy.mothers, eager.mothers)
+    assert_equal(lazy.daughters, -1)
+    assert lazy == eager
+
+
+def test_MCEvent_reuse_buffers():
+    eager = BeamEvent(False)
+    generator = BeamEvent(False).generator_ns
+    generator.reuse_buffers = True
+    generator._event_arena = None
+    evt1 = BeamEvent(False, generator)
+    arena = generator._event_arena
+    assert arena.capacity == 6
+    assert evt1 == eager
+    assert_equal(evt1.mothers, [[-1, -1], [-1, -1], [2, 2], [2, 2], [2, 2]])
+    assert evt1.pid.dtype == eager.pid.dtype
+
+    evt2 = BeamEvent(False, generator)
+    assert generator._event_arena is arena
+    assert np.shares_memory(evt1.pz, evt2.pz)
+    assert evt2 == eager
+
+    # beam rows are updated when kinematics change
+    generator.kinematics = CenterOfMass(10, "p", "n")
+    evt3 = BeamEvent(False, generator)
+    assert_equal(evt3.pid[:3], [2212, 2112, 211])
+    assert_equal(evt3.mothers[:2], [[-1, -1], [-1, -1]])
+
+
+def test_MCEvent_reuse_buffers_boosted():
+    # the generator frame differs from the frame of the kinematics
+    kin = FixedTarget(100, "p", "p")
+    generator = BeamEvent(False).generator_ns
+    generator.kinematics = kin
+    generator.reuse_buffers = True
+    generator._event_arena = None
+    for _ in range(3):
+        evt = BeamEvent(False, generator)
+        kin.apply_boost(evt, generator._frame)
+        assert_allclose(evt.en[:2], [kin.elab, kin.m2])
+        assert_allclose(evt.pz[:2], [kin.plab, 0], atol=1e-10)
+
+
+def test_EventData_derived(evt):
+    pt = evt.pt
+    assert_allclose(pt, np.hypot(evt.px, evt.py))
+    # a copy of the cached value is returned, which can be modified
+    pt *= 2
+    assert_allclose(evt.pt, np.hypot(evt.px, evt.py))
+    # intermediates are cached
+    evt.compute(["eta"])
+    assert set(evt._derived[1]) == {"pt2", "pt", "p_tot", "eta"}
+
+    # cache is cleared if an array is replaced or boosted
+    evt.px = evt.px * 2
+    assert_allclose(evt.pt, np.hypot(evt.px, evt.py))
+    y = evt.y
+    evt.kin.apply_boost(evt, EventFrame.FIXED_TARGET)
+    # rapidity is shifted by a constant
+    dy = evt.y - y
+    assert dy[0] != 0
+    assert_allclose(dy, dy[0])
+    evt.pz[:] = 0
+    evt.clear_cache()
+    assert_equal(evt.eta, 0)
+
+    pt, _, phi = evt.compute(["pt", "eta", "phi"], dtype=np.float32)
+    assert pt.dtype == np.float32
+    assert_allclose(pt, evt.pt, rtol=1e-6)
+    assert_allclose(phi, evt.phi, rtol=1e-6)
+    with pytest.raises(ValueError):
+        evt.compute(["pid"])
+
+
+def test_single_precision(evt):
+    evt = _to_single_precision(evt.copy())
+    assert evt.pid.dtype == np.int32
+    assert evt.px.dtype == np.float32
+    assert evt.mothers.dtype == np.int32
+    fs = evt.final_state()
+    assert fs.en.dtype == np.float32
+    evt.kin.apply_boost(evt, EventFrame.FIXED_TARGET)
+    assert evt.pz.dtype == np.float32
+
+    lazy = BeamEvent(True)
+    lazy.generator_ns.precision = "single"
+    assert "charge" not in _to_single_precision(lazy).__dict__
+    assert lazy.pz.dtype == np.float32
+    assert lazy.vx.dtype == np.float32
+    assert lazy.mothers.dtype == np.int32
+
+
+def test_EventData_pickle_protocol_5(evt):
+    evt = evt.copy()
+    buffers = []
+    data = pickle.dumps(evt, protocol=5, buffer_callback=buffers.append)
+    # arrays of the event and the beams of the kinematics are out-of-band
+    assert len(buffers) == 14 + 2
+    evt2 = pickle.loads(data, buffers=buffers)
+    assert evt2 == evt
+    assert pickle.loads(pickle.dumps(evt, protocol=5)) == evt
+
+    # events in one stream share the kinematics
+    a, b = pickle.loads(pickle.dumps([evt, evt[:2]], protocol=5))
+    assert a.kin is b.kin
+
+    eager = BeamEvent(False)
+    restored = pickle.loads(pickle.dumps(eager, protocol=5))
+    assert type(restored) is EventData
+    assert restored == eager
+
+
 def test_EventData_select(evt):
     x = evt[1]
     assert x.pid == evt.pid[1]
@@ -149,6 +346,123 @@ def test_EventData_select(evt):
     assert_equal(x.pid, [1, 3])
 
 
+def test_EventBatch():
+    i = np.array([1, 2, 3])
+    f = np.array([1.1, 2.2, 3.3])
+    p = np.array([[1, -1], [2, -1], [2, 3]])
+    evt = EventData(
+        ("foo", "bar"),
+        CenterOfMass(10, "p", "p"),
+        1,
+        0.5,
+        (1, 1),
+        1.0,
+        i,
+        i,
+        f,
+        f,
+        f,
+        f,
+        f,
+        f,
+        f,
+        f,
+        f,
+        f,
+        p,
+        p,
+    )
+    builder = _EventBatchBuilder(2, vertices=True, history=True, capacity=1)
+    builder.append_event(evt)
+    evt2 = evt[[True, False, True]]
+    builder.append_event(evt2)
+    batch = builder.finish(SimpleNamespace(name="foo", version="bar"), evt.kin)
+    assert len(batch) == 2
+    assert_equal(batch.offsets, [0, 3, 5])
+    assert_equal(batch.pid, [1, 2, 3, 1, 3])
+    assert_equal(batch.nevent, [1, 1])
+    assert batch[0] == evt
+    assert_equal(batch[-1].px, evt2.px)
+    assert_equal(batch[-1].mothers, evt2.mothers)
+    # missing history is stored as -1
+    assert evt2.daughters is None
+    assert_equal(batch[-1].daughters, -1)
+    with pytest.raises(IndexError):
+        batch[2]
+
+
+def test_EventBatch_from_stack():
+    hepevt = SimpleNamespace(
+        nevhep=1,
+        nhep=2,
+        idhep=np.ones(3, dtype=np.int32),
+        isthep=np.ones(3, dtype=np.int32),
+        phep=np.ones((5, 3), dtype=np.double),
+        vhep=np.ones((4, 3), np.double),
+        jmohep=np.ones((2, 3), np.int32),
+        jdahep=np.ones((2, 3), np.int32),
+    )
+    reader = DummyEvent.__new__(DummyEvent)
+    reader._lib = SimpleNamespace(hepevt=hepevt)
+    generator = SimpleNamespace(
+        name="foo", version="bar", _inel_or_prod_cross_section=1.0
+    )
+    builder = _EventBatchBuilder(3, vertices=False, history=True)
+    for _ in range(3):
+        builder.append_stack(reader, generator)
+    batch = builder.finish(generator, CenterOfMass(10, "p", "p"))
+    assert len(batch) == 3
+    assert_equal(batch.offsets, [0, 2, 4, 6])
+    assert_equal(batch.pid, 1)
+    assert_equal(batch.charge, 0)
+    assert_equal(batch.mothers, 0)
+    assert batch.vx is None
+
+
+def test_validate_decay():
+    decayed = []
+    generator = SimpleNamespace(
+        _final_state_particles=np.array([-211, 211]),
+        _must_decay_pids=None,
+        _decay_handler=decayed.append,
+        pyname="Foo",
+    )
+    event = SimpleNamespace(
+        pid=np.array([2212, 211, 111, 22]), status=np.array([4, 1, 2, 1])
+    )
+    MCRun._validate_decay(generator, event)
+    assert decayed == []
+    assert 111 in generator._must_decay_pids
+    assert 211 not in generator._must_decay_pids
+
+    event.status[2] = 1
+    MCRun._validate_decay(generator, event)
+    assert decayed == [event]
+
+    generator._decay_handler = None
+    with pytest.warns(RuntimeWarning, match="111"):
+        MCRun._validate_decay(generator, event)
+
+
+def run_generate_batch():
+    evt_kin = CenterOfMass(100 * GeV, "p", "p")
+    m = Sibyll23d(evt_kin, seed=1)
+    # a model can only be initialized once per process, reset its state instead
+    state = m.random_state
+    events = [event.final_state().copy() for event in m(10)]
+    m.random_state = state
+    return events, m.generate_batch(10)
+
+
+def test_generate_batch():
+    events, batch = run_in_separate_process(run_generate_batch)
+    assert len(batch) == len(events)
+    for i, event in enumerate(events):
+        fs = batch[i][batch[i].status == 1]
+        assert_equal(fs.pid, event.pid)
+        assert_equal(fs.pz, event.pz)
+
+
 @pytest.mark.parametrize("Model", get_all_models())
 def test_models_beam(Model):
     """Tests whether all models have correct beam particles"""
@@ -181,3 +495,157 @@ def test_models_beam(Model):
                 assert np.allclose(
                     event_field[0:2], beam_field
                 ), f"{field}: {np.allclose(event_field[0:2], beam_field)}, {event_field[0:2]}, {beam_field}"
+
+
+def test_inel_or_prod_cross_section():
+    calls = []
+
+    def cross_section():
+        kin = generator.kinematics
+        calls.append(kin)
+        return CrossSectionData(inelastic=kin.ecm, prod=2 * kin.ecm)
+
+    generator = SimpleNamespace(
+        _cross_section_memo=None,
+        _skip_cross_section=False,
+        cross_section=cross_section,
+    )
+    get = MCRun._update_cross_section
+
+    generator.kinematics = CenterOfMass(100 * GeV, "p", "p")
+    assert get(generator) == 100 * GeV
+    assert get(generator) == 100 * GeV
+    assert len(calls) == 1
+
+    generator.kinematics = CenterOfMass(100 * GeV, "p", "N")
+    assert get(generator) == 200 * GeV
+    assert len(calls) == 2
+
+    # composite targets are distinct from their heaviest component
+    generator.kinematics = CenterOfMass(
+        100 * GeV, "p", CompositeTarget([("N", 3), ("O", 1)])
+    )
+    assert get(generator) == 200 * GeV
+    assert len(calls) == 3
+
+    generator.kinematics = CenterOfMass(100 * GeV, "p", "p")
+    assert get(generator) == 100 * GeV
+    assert len(calls) == 3
+
+    # not computed while generating a spectrum
+    generator._skip_cross_section = True
+    generator.kinematics = CenterOfMass(200 * GeV, "p", "p")
+    assert np.isnan(get(generator))
+    assert len(calls) == 3
+
+
+class CompositeRun:
+    _composite_plan = MCRun._composite_plan
+    _composite_kinematics = MCRun._composite_kinematics
+    _switch_component = MCRun._switch_component
+    _composite_cache = None
+
+    def __init__(self, kin):
+        self._kinematics = kin
+        self._rng = np.random.default_rng(1)
+        self.switches = []
+
+    @property
+    def kinematics(self):
+        return self._kinematics
+
+    def _set_kinematics(self, kin):
+        self.switches.append(kin)
+
+
+def test_composite_plan():
+    target = CompositeTarget([("N", 3), ("O", 1)])
+    kin = CenterOfMass(100 * GeV, "p", target)
+    generator = CompositeRun(kin)
+
+    targets = []
+    for nev in generator._composite_plan(1000):
+        assert nev > 0
+        targets += [int(generator.kinematics.p2)] * nev
+    targets = np.array(targets)
+    assert len(targets) == 1000
+    assert_allclose(np.mean(targets == target.components[0]), 0.75, atol=0.05)
+    # events are interleaved, not grouped by component
+    assert np.sum(np.diff(targets) != 0) > 100
+    # kinematics of the components are computed once
+    assert len({id(k) for k in generator.switches}) == 3
+    assert generator.kinematics is kin
+    assert generator.switches[-1] is kin
+
+
+def run_interact():
+    kin = FixedTarget(1e3 * GeV, "p", "N")
+    m = Sibyll23d(kin, seed=1)
+    state = m.random_state
+    event = next(m(1)).final_state()
+    m.random_state = state
+    result = m.interact("p", 1e3 * GeV, "N")
+    result2 = m.interact("pi+", 1e5 * GeV, "O")
+    return event, result, result2, m.kinematics
+
+
+def test_without_cross_section():
+    class Generator:
+        name = "foo"
+
+        @property
+        def _inel_or_prod_cross_section(self):
+            raise AssertionError("cross section is computed")
+
+    generator = _WithoutCrossSection(Generator())
+    assert generator.name == "foo"
+    assert np.isnan(generator._inel_or_prod_cross_section)
+
+
+def test_interact():
+    event, (pid, _, _, pz, en), result2, kin = run_in_separate_process(run_interact)
+    assert_equal(pid, event.pid)
+    assert_allclose(pz, event.pz)
+    assert_allclose(en, event.en)
+    assert kin == FixedTarget(1e5 * GeV, "pi+", "O")
+    assert np.sum(result2[4]) > 1e4 * GeV
+
+
+@pytest.mark.parametrize("gamma", (1.0, 2.7))
+def test_sample_spectrum(gamma):
+    rng = np.random.default_rng(1)
+    e = _sample_spectrum(rng, 100000, gamma, 10.0, 1e4)
+    assert np.all((e >= 10) & (e <= 1e4))
+    # fraction of events in the first decade for a power law
+    a = 1 - gamma
+    if a == 0:
+        expected = 1 / 3
+    else:
+        expected = (100**a - 10**a) / (1e4**a - 10**a)
+    assert_allclose(np.mean(e < 100), expected, atol=0.01)
+
+    # tabulated spectrum gives the same distribution
+    table = np.geomspace(1, 1e5, 20)
+    e2 = _sample_spectrum(rng, 100000, (table, table**-gamma), 10.0, 1e4)
+    assert_allclose(np.mean(e2 < 100), expected, atol=0.01)
+
+
+def run_generate_spectrum():
+    m = Sibyll23d(CenterOfMass(100 * GeV, "p", "N"), seed=1)
+    events = [event.copy() for event in m.generate_spectrum(20, 2.7, 1e2, 1e6)]
+    return events, m.kinematics
+
+
+def test_generate_spectrum():
+    events, kin = run_in_separate_process(run_generate_spectrum)
+    assert kin == CenterOfMass(100 * GeV, "p", "N")
+    elab = [event.kin.elab for event in events]
+    assert np.all(np.diff(elab) <= 0)
+    assert 1e2 <= elab[-1] and elab[0] <= 1e6
+    for event in events:
+        assert event.kin.frame == EventFrame.FIXED_TARGET
+        assert np.isnan(event.production_cross_section)
+        # final state energy in the lab frame matches the sampled energy,
+        # up to the masses of the target nucleons
+        en = np.sum(event.final_state().en)
+        assert event.kin.elab < en < event.kin.elab + 14 * GeV
@@ -0,0 +1,111 @@
+import dataclasses
+
+import numpy as np
+import pytest
+from numpy.testing import assert_allclose
+
+from chromo.common import CrossSectionData
+from chromo.constants import standard_projectiles
+from chromo.cross_section_table import CrossSectionTable
+from chromo.kinematics import FixedTarget
+from chromo.util import CompositeTarget, Nuclei
+
+
+class FakeGenerator:
+    label = "Fake-1.0"
+    projectiles = standard_projectiles
+    targets = Nuclei()
+
+    def __init__(self):
+        self.ncalls = 0
+        self.nsets = 0
+        self._kinematics = FixedTarget(100, "p", "p")
+
+    @property
+    def kinematics(self):
+        return self._kinematics
+
+    @kinematics.setter
+    def kinematics(self, kin):
+        self.nsets += 1
+        self._kinematics = kin
+
+    def _switch_energy(self, kin):
+        self._kinematics = kin
+
+    def _check_kinematics(self, kin):
+        pass
+
+    def cross_section(self):
+        kin = self.kinematics
+        self.ncalls += 1
+        if kin.p2.A > 20:
+            raise ValueError("target not supported")
+        inel = kin.p2.A * np.log(kin.elab)
+        return CrossSectionData(inelastic=inel, prod=inel)
+
+
+@pytest.fixture
+def data_dir(tmp_path, monkeypatch):
+    import chromo.cross_section_table as m
+
+    monkeypatch.setattr(m, "_data_dir", lambda name: tmp_path)
+    return tmp_path
+
+
+def test_cross_section_table(data_dir):
+    energies = np.geomspace(10, 1e6, 11)
+    gen = FakeGenerator()
+    table = CrossSectionTable(gen, energies, ("p", "pi+"), ("p", "N", "O", "Pb"))
+    assert gen.ncalls == 2 * 4 * 11
+    # kinematics are set once per combination and restored
+    assert gen.nsets == 2 * 4 + 1
+    assert gen.kinematics == FixedTarget(100, "p", "p")
+    assert len(list(data_dir.iterdir())) == 1
+
+    cs = table("p", "N", [10, 1e3, 1e7])
+    assert_allclose(cs.inelastic, [14 * np.log(10), 14 * np.log(1e3), np.nan])
+    assert np.isnan(cs.elastic).all()
+    assert np.isnan(table("pi+", "Pb", 100).inelastic)
+
+    air = CompositeTarget([("N", 3), ("O", 1)])
+    assert_allclose(table("p", air, 1e3).prod, 14.5 * np.log(1e3))
+
+    # loaded from disk
+    gen2 = FakeGenerator()
+    table2 = CrossSectionTable(gen2, energies, ("p", "pi+"), ("p", "N", "O", "Pb"))
+    assert gen2.ncalls == 0
+    assert dataclasses.astuple(table2("p", "O", 1e4)) == pytest.approx(
+        dataclasses.astuple(table("p", "O", 1e4)), nan_ok=True
+    )
+    with pytest.raises(ValueError):
+        table("K+", "p", 100)
+
+
+class FakeGeneratorWithTargets(FakeGenerator):
+    projectiles = frozenset((2212, 211))
+    targets = Nuclei(a_max=20)
+
+
+def test_cross_section_table_unsupported_targets(data_dir):
+    gen = FakeGeneratorWithTargets()
+    table = CrossSectionTable(gen, [1e2, 1e3])
+    assert table.projectiles == (211, 2212)
+    assert table.targets == (2212, 1000070140, 1000080160)
+
+    with pytest.warns(RuntimeWarning, match="air components"):
+        sigma = table.sigma_prod_air("p", 1e2)
+    expected = (0.78084 * 14 + 0.20946 * 16) / (0.78084 + 0.20946) * np.log(1e2)
+    assert_allclose(sigma, expected)
+
+    with pytest.warns(RuntimeWarning, match="does not support targets"):
+        table = CrossSectionTable(gen, [1e2, 1e3], ("p",), ("N", "Pb"))
+    assert table.targets == (1000070140,)
+    with pytest.warns(RuntimeWarning, match="does not support projectiles"):
+        table = CrossSectionTable(gen, [1e2, 1e3], ("p", "K+"), ("N",))
+    assert table.projectiles == (2212,)
+
+    with pytest.raises(ValueError, match="projectile"):
+        table("pi+", "N", 1e2)
+    with pytest.raises(ValueError, match="target"):
+        table("p", "O", 1e2)
@@ -0,0 +1,139 @@
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+from numpy.testing import assert_allclose, assert_equal
+
+from chromo import decay
+from chromo.common import EventBatch
+from chromo.decay import NumpyDecayHandler, _three_body, _two_body_momentum
+from chromo.kinematics import CenterOfMass
+from chromo.util import mass
+
+
+def make_event(pid, pz):
+    n = len(pid)
+    m = np.array([mass(p) for p in pid])
+    pz = np.array(pz, dtype=float)
+    return SimpleNamespace(
+        pid=np.array(pid),
+        status=np.ones(n, dtype=np.int32),
+        charge=np.zeros(n),
+        px=np.full(n, 0.1),
+        py=np.full(n, -0.2),
+        pz=pz,
+        en=np.sqrt(m**2 + 0.05 + pz**2),
+        m=m,
+        vx=np.zeros(n),
+        vy=np.zeros(n),
+        vz=np.zeros(n),
+        vt=np.zeros(n),
+        mothers=None,
+        daughters=None,
+    )
+
+
+@pytest.fixture
+def handler():
+    return NumpyDecayHandler([211, -211, 2212, 2112, 22], seed=1, fallback=False)
+
+
+def test_decay(handler):
+    event = make_event([2212, 111, 3334, -3122, 221, 310], [100, 10, 50, -20, 5, 3])
+    p0 = [np.sum(getattr(event, k)) for k in ("px", "py", "pz", "en")]
+    handler(event)
+
+    fs = event.status == 1
+    # all unstable particles were decayed
+    assert not np.any(np.isin(event.pid[fs], handler.all_unstable_pids))
+    assert_equal(event.status[:6], [1, 2, 2, 2, 2, 2])
+    p1 = [np.sum(getattr(event, k)[fs]) for k in ("px", "py", "pz", "en")]
+    assert_allclose(p1, p0)
+    assert_allclose(
+        event.en**2 - event.px**2 - event.py**2 - event.pz**2, event.m**2, atol=1e-6
+    )
+
+    # history is consistent
+    for i in np.flatnonzero(event.status == 2):
+        a, b = event.daughters[i]
+        assert a >= 0 and b >= a
+        assert_equal(event.mothers[a : b + 1, 0], i)
+    assert_equal(event.charge[event.pid == -2212], -1)
+
+    # Omega- -> Lambda K- -> p pi- K-
+    assert -321 in event.pid or 3322 in event.pid or 3312 in event.pid
+    # K0S has a macroscopic decay length
+    k0s = np.flatnonzero(event.pid == 310)[0]
+    a, _ = event.daughters[k0s]
+    assert event.vz[a] > 0
+
+
+def test_decay_batch(handler):
+    events = [
+        make_event([211, 111], [1, 2]),
+        make_event([], []),
+        make_event([310], [5]),
+    ]
+    batch = EventBatch(
+        ("foo", "bar"),
+        CenterOfMass(10, "p", "p"),
+        np.cumsum([0] + [len(e.pid) for e in events]),
+        np.arange(3),
+        np.zeros(3),
+        np.zeros((3, 2), dtype=int),
+        np.zeros(3),
+        *(
+            np.concatenate([getattr(e, k) for e in events])
+            for k in ("pid", "status", "charge", "px", "py", "pz", "en", "m")
+        ),
+    )
+    handler.decay_batch(batch)
+    assert len(batch) == 3
+    assert_equal(batch[0].pid[:2], [211, 111])
+    assert_equal(batch[0].pid[2:], [22, 22])
+    assert_equal(batch[0].mothers[2:, 0], 1)
+    assert_equal(batch[0].daughters[1], [2, 3])
+    assert len(batch[1]) == 0
+    ev = batch[2]
+    assert ev.pid[0] == 310
+    assert ev.status[0] == 2
+    a, b = ev.daughters[0]
+    assert_equal(ev.mothers[a : b + 1, 0], 0)
+    assert np.all(ev.status[ev.status != 2] == 1)
+
+
+def test_three_body_phase_space():
+    # distribution of m12 in eta -> 3 pi0 against the phase space density
+    m, m1 = mass(221), mass(111)
+    n = 100_000
+    rng = np.random.default_rng(1)
+    (e1, p1), (e2, p2), (e3, p3) = _three_body(np.full(n, m), m1, m1, m1, rng)
+    m12 = np.sqrt((e1 + e2) ** 2 - np.sum((p1 + p2) ** 2, axis=1))
+    assert_allclose(e1 + e2 + e3, m)
+    assert_allclose(p1 + p2 + p3, 0, atol=1e-12)
+
+    x = np.linspace(2 * m1, m - m1, 1001)
+    density = _two_body_momentum(m, x, m1) * _two_body_momentum(x, m1, m1)
+    mean = np.sum(x * density) / np.sum(density)
+    assert m12.mean() == pytest.approx(mean, abs=3 * m12.std() / np.sqrt(n))
+
+
+def test_make_channels(monkeypatch):
+    # the branching ratios of 221 add up to slightly less than 1
+    brs = (0.09, 0.57, 0.34, 0.23, 0.97)
+    monkeypatch.setattr(
+        decay,
+        "_decay_table",
+        {
+            111: ((1.0, (22, 22)),),
+            221: tuple((br, (22, 22)) for br in brs),
+            223: ((1.0, (111, 22)),),
+        },
+    )
+    parents, cumulative, _ = decay._make_channels()
+    assert_equal(parents, [111] + [221] * 5 + [223])
+    assert_equal(cumulative[[0, 5, 6]], [1, 2, 3])
+    assert_allclose(np.diff(cumulative[:6]), np.divide(brs, sum(brs)))
+    # the largest number for 221 selects a channel of 221
+    u = np.nextafter(2.0, 0.0)
+    assert parents[np.searchsorted(cumulative, u)] == 221
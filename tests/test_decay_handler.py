@@ -95,3 +95,115 @@ def test_decay_handler(Model):
         evt_kin = chromo.kinematics.FixedTarget(100, "p", "O")
 
     run_in_separate_process(run_decay_handler, Model, evt_kin, stable_particles)
+
+
+class FakePythiaEvent:
+    # decays every pi0 on the stack into two photons
+    def fill(self, pid, status, px, py, pz, en, m):
+        self.data = [
+            (p, 1, x, y, z, e, mi, 0, 0)
+            for (p, x, y, z, e, mi) in zip(pid, px, py, pz, en, m)
+        ]
+
+    def decay(self):
+        n = len(self.data)
+        for i in range(n):
+            p, _, x, y, z, e, m, _, _ = self.data[i]
+            if p != 111:
+                continue
+            k = len(self.data)
+            self.data[i] = (p, 2, x, y, z, e, m, k + 1, k + 2)
+            for _ in range(2):
+                self.data.append((22, 1, x / 2, y / 2, z / 2, e / 2, 0.0, 0, 0))
+            self.parents[k + 1] = self.parents[k + 2] = i + 1
+
+    @property
+    def size(self):
+        return len(self.data)
+
+    def column(self, i):
+        return np.array([d[i] for d in self.data])
+
+    def pid(self):
+        return self.column(0)
+
+    def status(self):
+        return self.column(1)
+
+    def px(self):
+        return self.column(2)
+
+    def py(self):
+        return self.column(3)
+
+    def pz(self):
+        return self.column(4)
+
+    def en(self):
+        return self.column(5)
+
+    def m(self):
+        return self.column(6)
+
+    def vx(self):
+        return np.zeros(self.size)
+
+    vy = vz = vt = vx
+
+    def mothers(self):
+        return np.array(
+            [[self.parents.get(i + 1, 0), 0] for i in range(self.size)], dtype=np.int32
+        )
+
+    def daughters(self):
+        return np.array([[d[7], d[8]] for d in self.data], dtype=np.int32)
+
+
+class FakePythia:
+    def __init__(self):
+        self.event = FakePythiaEvent()
+
+    def forceHadronLevel(self):
+        self.event.parents = {}
+        self.event.decay()
+
+    def charge(self):
+        return np.zeros(self.event.size, dtype=np.float32)
+
+
+def test_decay_handler_splice():
+    from types import SimpleNamespace
+
+    handler = Pythia8DecayHandler.__new__(Pythia8DecayHandler)
+    handler.pythia = FakePythia()
+    handler.all_unstable_pids = np.array([111])
+
+    pid = np.array([2212, 111, 211, 111, 111])
+    event = SimpleNamespace(
+        pid=pid,
+        status=np.array([4, 1, 1, 2, 1]),
+        charge=np.array([1.0, 0.0, 1.0, 0.0, 0.0]),
+        px=np.arange(5.0),
+        py=np.arange(5.0),
+        pz=np.arange(5.0),
+        en=np.arange(5.0) + 10,
+        m=np.ones(5),
+        vx=np.zeros(5),
+        vy=np.zeros(5),
+        vz=np.zeros(5),
+        vt=np.zeros(5),
+        mothers=np.array([[-1, -1], [0, -1], [0, -1], [0, -1], [0, -1]]),
+        daughters=None,
+    )
+    handler(event)
+
+    np.testing.assert_equal(event.pid, [2212, 111, 211, 111, 111, 22, 22, 22, 22])
+    np.testing.assert_equal(event.status, [4, 2, 1, 2, 2, 1, 1, 1, 1])
+    np.testing.assert_equal(event.px[5:], [0.5, 0.5, 2, 2])
+    np.testing.assert_equal(event.mothers[5:, 0], [1, 1, 4, 4])
+    np.testing.assert_equal(event.mothers[:5], [[-1, -1]] + [[0, -1]] * 4)
+    np.testing.assert_equal(event.daughters[1], [5, 6])
+    np.testing.assert_equal(event.daughters[4], [7, 8])
+    np.testing.assert_equal(event.daughters[3], [-1, -1])
+    assert event.charge.dtype == np.float32
+    assert len(event.vx) == 9
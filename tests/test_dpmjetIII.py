@@ -93,3 +93,22 @@ def test_cross_section_pA():
     naneq(c.diffractive_xb, np.nan)
     naneq(c.diffractive_xx, np.nan)
     naneq(c.diffractive_axb, np.nan)
+
+
+def run_emulsion():
+    air = chromo.util.CompositeTarget([("N", 0.78), ("O", 0.22)])
+    kin = chromo.kinematics.FixedTarget(1e3 * GeV, "p", air)
+    m = chromo.models.DpmjetIII193(kin, seed=1)
+    cs = [
+        m.cross_section(chromo.kinematics.FixedTarget(1e3 * GeV, "p", t)).prod
+        for t in air.components
+    ]
+    targets = [int(event.kin.p2) for event in m(50)]
+    return cs, targets, m._emulsion
+
+
+def test_emulsion():
+    (cs_n, cs_o), targets, emulsion = run_in_separate_process(run_emulsion)
+    assert emulsion == ((14, 7), (16, 8))
+    assert 0 < cs_n < cs_o
+    assert set(targets) == {1000070140, 1000080160}
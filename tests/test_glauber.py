@@ -0,0 +1,97 @@
+import dataclasses
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+from numpy.testing import assert_allclose
+
+from chromo import glauber
+from chromo.common import CrossSectionData
+from chromo.constants import GeV
+from chromo.kinematics import CenterOfMass
+from chromo.models import QGSJetII04, Sibyll23d
+from chromo.util import CompositeTarget
+
+
+def test_combine():
+    values = [[1.0, 2.0], [3.0, 2.0]]
+    mean, error = glauber._combine(values, [1, 1])
+    assert_allclose(mean, [2.0, 2.0])
+    assert_allclose(error, [1.0, 0.0])
+
+    mean, error = glauber._combine(values, [3, 1])
+    assert_allclose(mean, [1.5, 2.0])
+
+    mean, error = glauber._combine(values[:1], [5])
+    assert_allclose(mean, values[0])
+    assert np.isnan(error).all()
+
+
+def test_cross_section_cached(tmp_path, monkeypatch):
+    monkeypatch.setattr(glauber, "_data_dir", lambda name: tmp_path)
+    Model = SimpleNamespace(label="Foo-1.0", glauber_trials=1000)
+    kin = CenterOfMass(100 * GeV, "He", "N")
+    value = CrossSectionData(total=1.0, prod=2.0)
+    error = CrossSectionData(total=0.1, prod=0.2)
+    path = glauber._cache_path(Model, kin, 100)
+    assert path != glauber._cache_path(Model, kin, 200)
+    # composite targets are distinct from their heaviest component
+    air = CompositeTarget([("N", 3), ("O", 1)])
+    kin2 = CenterOfMass(100 * GeV, "He", air)
+    assert glauber._cache_path(Model, kin2, 100) != glauber._cache_path(
+        Model, CenterOfMass(100 * GeV, "He", "O"), 100
+    )
+    np.savez(path, value=dataclasses.astuple(value), error=dataclasses.astuple(error))
+
+    # a cached result does not start workers
+    v, e = glauber.cross_section(Model, kin, 100)
+    assert v == value
+    assert e == error
+
+
+@pytest.mark.parametrize("workers", (1, 2))
+def test_cross_section(workers):
+    kin = CenterOfMass(100 * GeV, "He", "N")
+    # a single worker computes two batches to estimate the error
+    value, error = glauber.cross_section(
+        QGSJetII04, kin, 40, workers=workers, seed=1, cache=False
+    )
+    assert value.prod > 0
+    assert 0 < error.prod < value.prod
+    assert value.total >= value.prod
+
+
+class FakeModel:
+    # Glauber integration without a Fortran library
+    label = "Fake-1.0"
+    glauber_trials = 1000
+
+    def __init__(self, evt_kin, seed=None):
+        self.rng = np.random.default_rng(seed)
+
+    def cross_section(self, max_info=False):
+        prod = self.rng.normal(100, 10 / np.sqrt(self.glauber_trials))
+        return CrossSectionData(prod=prod)
+
+
+def test_cross_section_single_worker():
+    kin = CenterOfMass(100 * GeV, "He", "N")
+    value, error = glauber.cross_section(
+        FakeModel, kin, 100, workers=1, seed=1, cache=False
+    )
+    assert 0 < error.prod < 10
+    assert value.prod == pytest.approx(100, abs=5 * error.prod)
+
+
+def test_cross_section_unsupported_model():
+    kin = CenterOfMass(100 * GeV, "He", "N")
+    with pytest.raises(ValueError, match="does not support"):
+        glauber.cross_section(Sibyll23d, kin, 10, cache=False)
+
+
+def test_cross_section_worker_error():
+    kin = CenterOfMass(100 * GeV, "He", "N")
+    with pytest.raises(RuntimeError, match="worker 0 failed"):
+        glauber.cross_section(
+            QGSJetII04, kin, 10, workers=1, cache=False, unknown_option=True
+        )
@@ -23,6 +23,8 @@ from particle import literals as lp
 from pytest import approx
 import pytest
 import numpy as np
+from numpy.testing import assert_allclose
+from types import SimpleNamespace
 
 
 def test_CompositeTarget_repr():
@@ -225,3 +227,50 @@ def test_kinematics_m1_m2():
     k = EventKinematicsWithRestframe("proton", "neutron", ecm=10)
     assert np.allclose(k.m1, mass(2212))
     assert np.allclose(k.m2, mass(2112))
+
+
+@pytest.mark.parametrize("p1", ("p", "pi-", "He"))
+def test_kinematics_with_elab(p1):
+    kin = FixedTarget(1e3, p1, "N")
+    for elab in (10.0, 1e3, 1e6):
+        kin2 = kin._with_elab(elab)
+        assert kin2 == FixedTarget(elab, p1, "N")
+        assert kin2.m1 == kin.m1
+        assert kin2._beam_data is None
+    # original is unchanged
+    assert kin == FixedTarget(1e3, p1, "N")
+    for elab in (kin.m1, 0.0, np.nan):
+        with pytest.raises(ValueError):
+            kin._with_elab(elab)
+
+
+def test_kinematics_apply_boost_generic():
+    kin = EventKinematicsWithRestframe("p", "Pb", beam=(4000 * GeV, -1577 * GeV))
+    assert kin.frame == EventFrame.GENERIC
+    cms = CenterOfMass(kin.ecm, "p", "Pb")
+    ft = FixedTarget(kin.elab, "p", "Pb")
+    for other in (cms, ft):
+        # beams of generator frame boosted into the frame of the kinematics
+        event = SimpleNamespace(
+            en=np.array([other.beams[0][3], other.beams[1][3]]),
+            pz=np.array([other.beams[0][2], other.beams[1][2]]),
+        )
+        kin.apply_boost(event, other.frame)
+        assert_allclose(event.en, [kin.beams[0][3], kin.beams[1][3]])
+        assert_allclose(event.pz, [kin.beams[0][2], kin.beams[1][2]], atol=1e-6)
+        kin.apply_boost(event, other.frame, inverse=True)
+        assert_allclose(event.en, [other.beams[0][3], other.beams[1][3]])
+        assert_allclose(event.pz, [other.beams[0][2], other.beams[1][2]], atol=1e-6)
+
+    # fixed target and center-of-mass frame, boosts are precomputed
+    en = np.array([ft.elab, nucleon_mass])
+    pz = np.array([ft.plab, 0.0])
+    event = SimpleNamespace(en=en, pz=pz)
+    cms.apply_boost(event, EventFrame.FIXED_TARGET)
+    assert event.en is en
+    assert_allclose(pz, [cms.pcm, -cms.pcm])
+    assert (EventFrame.FIXED_TARGET, False) in cms._boost_cache
+
+    massless = EventKinematicsMassless("gamma", "gamma", ecm=100 * GeV)
+    with pytest.raises(NotImplementedError):
+        massless.apply_boost(event, EventFrame.FIXED_TARGET)
@@ -0,0 +1,280 @@
+import multiprocessing as mp
+import os
+import threading
+import time
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+from numpy.testing import assert_equal
+
+from chromo import parallel
+from chromo.common import EventData, _to_single_precision
+from chromo.constants import GeV
+from chromo.kinematics import CenterOfMass
+from chromo.models import Sibyll23d
+
+
+def test_split():
+    assert parallel._split(10, 3) == [4, 3, 3]
+    assert parallel._split(2, 2) == [1, 1]
+    assert sum(parallel._split(12345, 7)) == 12345
+
+
+def test_child_seeds():
+    a = parallel._child_seeds(1, 4)
+    assert len(set(a)) == 4
+    assert a == parallel._child_seeds(1, 4)
+    assert a != parallel._child_seeds(2, 4)
+
+
+def test_sender_receiver():
+    kin = CenterOfMass(100 * GeV, "p", "p")
+    x = np.arange(4.0)
+    h = np.array([[-1, -1], [0, 0], [0, 0], [1, 2]])
+
+    def event(nevent):
+        return EventData(
+            ("foo", "bar"), kin, nevent, 0.0, (1, 1), 1.0, *((x,) * 12), h, h
+        )
+
+    recv, send = mp.Pipe(duplex=False)
+    sender = parallel._Sender(send)
+    sender.send(event(1))
+    sender.send(event(2))
+    sender.send(None)
+    receiver = parallel._Receiver(recv)
+    a = receiver.recv()
+    b = receiver.recv()
+    assert receiver.recv() is None
+    assert a == event(1)
+    assert b == event(2)
+    # kinematics are sent once and shared
+    assert a.kin is b.kin
+    a.px[0] = 10
+    assert b.px[0] == 0
+
+
+class FakeModel:
+    # creates events of increasing size without a Fortran library
+    _lib = SimpleNamespace(npy=None)
+
+    def __init__(self, evt_kin, seed=None):
+        self.kinematics = evt_kin
+        self._reseed(seed)
+
+    def _reseed(self, seed):
+        self.rng = np.random.default_rng(seed)
+
+    def __call__(self, nevents):
+        for i in range(nevents):
+            n = 5 * (i + 1)
+            x = self.rng.random(n)
+            h = np.full((n, 2), i, dtype=np.int32)
+            fields = dict.fromkeys(
+                ("charge", "px", "py", "pz", "en", "m", "vx", "vy", "vz", "vt"), x
+            )
+            yield EventData(
+                ("fake", "1"),
+                self.kinematics,
+                i,
+                0.0,
+                (1, 1),
+                1.0,
+                pid=np.arange(n),
+                status=np.ones(n, dtype=int),
+                mothers=h,
+                daughters=None,
+                **fields,
+            )
+
+
+def test_shared_ring():
+    ring = parallel._SharedRing(12)
+    try:
+        events = list(FakeModel(CenterOfMass(100 * GeV, "p", "p"))(3))
+        a = ring.write(events[0])
+        b = ring.write(events[0])
+        assert (a.start, b.start) == (0, 5)
+        assert ring.view(a) == events[0]
+        assert ring.view(b) == events[0]
+        assert ring.view(b).daughters is None
+        # too large for the ring
+        assert ring.write(events[2]) is None
+        ring.release(b)
+        # does not fit at the end, wraps around
+        c = ring.write(events[1])
+        assert c.start == 12
+        assert ring.view(c) == events[1]
+    finally:
+        ring.close(unlink=True)
+
+
+def test_shared_ring_wait():
+    ring = parallel._SharedRing(12)
+    try:
+        events = list(FakeModel(CenterOfMass(100 * GeV, "p", "p"))(2))
+        a = ring.write(events[1])
+        # blocks until a is released
+        thread = threading.Thread(target=ring.write, args=(events[1],))
+        thread.start()
+        thread.join(0.1)
+        assert thread.is_alive()
+        ring.release(a)
+        thread.join(5)
+        assert not thread.is_alive()
+        assert ring._counters[0] == 22
+    finally:
+        ring.close(unlink=True)
+
+
+def test_shared_ring_attach(monkeypatch):
+    from multiprocessing import resource_tracker
+
+    ring = parallel._SharedRing(12)
+    try:
+        registered = []
+        monkeypatch.setattr(
+            resource_tracker, "register", lambda *args: registered.append(args)
+        )
+        other = parallel._SharedRing(*ring.args)
+        other.close()
+        assert registered == []
+    finally:
+        ring.close(unlink=True)
+
+
+def test_shared_ring_dtypes():
+    ring = parallel._SharedRing(12)
+    try:
+        event = next(FakeModel(CenterOfMass(100 * GeV, "p", "p"))(1))
+        event = _to_single_precision(event)
+        event.vx = event.vy = event.vz = event.vt = None
+        a = ring.write(event)
+        b = ring.view(a)
+        assert b == event
+        assert b.px.dtype == np.float32
+        assert b.pid.dtype == np.int32
+        assert b.vx is None
+        assert b.mothers is not None
+        event.pid = event.pid.astype(np.int64)
+        assert ring.view(ring.write(event)).pid.dtype == np.int64
+    finally:
+        ring.close(unlink=True)
+
+
+@pytest.mark.parametrize("shared_memory", (None, 20))
+def test_generate_shared_memory(shared_memory):
+    kin = CenterOfMass(100 * GeV, "p", "p")
+    expected = list(FakeModel(kin, seed=1)(2))
+    events = [
+        event.copy()
+        for event in parallel.generate(
+            FakeModel, kin, 6, workers=2, seed=1, shared_memory=shared_memory
+        )
+    ]
+    assert len(events) == 6
+    assert [len(x) for x in events] == [5, 5, 10, 10, 15, 15]
+    assert events[0].kin == kin
+    assert_equal(events[0].mothers, expected[0].mothers)
+    assert events[0].daughters is None
+
+
+class FakeModelWithoutNpy(FakeModel):
+    _lib = SimpleNamespace()
+
+
+@pytest.mark.parametrize("shared_memory", (None, 20))
+def test_generate_fork(shared_memory):
+    kin = CenterOfMass(100 * GeV, "p", "p")
+
+    def run():
+        return [
+            event.copy()
+            for event in parallel.generate(
+                FakeModel,
+                kin,
+                6,
+                workers=3,
+                seed=1,
+                fork=True,
+                shared_memory=shared_memory,
+            )
+        ]
+
+    a = run()
+    assert [len(x) for x in a] == [5, 5, 5, 10, 10, 10]
+    # forked workers are reseeded
+    assert not np.array_equal(a[0].px, a[1].px)
+    b = run()
+    assert all(ai == bi for (ai, bi) in zip(a, b))
+
+    with pytest.raises(RuntimeError, match="cannot be reseeded"):
+        list(parallel.generate(FakeModelWithoutNpy, kin, 2, workers=2, fork=True))
+
+
+class FakeModelKeyError(FakeModel):
+    def __call__(self, nevents):
+        raise KeyError("foo")
+
+
+@pytest.mark.parametrize("fork", (False, True))
+def test_generate_worker_exception(fork):
+    kin = CenterOfMass(100 * GeV, "p", "p")
+    # any exception is reported with its traceback
+    with pytest.raises(RuntimeError, match="(?s)worker 0 failed.*KeyError: 'foo'"):
+        list(parallel.generate(FakeModelKeyError, kin, 2, workers=2, fork=fork))
+
+
+class FakeModelCrash(FakeModel):
+    # the worker with one event dies, the others are slow and create
+    # the file done when they finish
+    def __init__(self, evt_kin, seed=None, done=None):
+        super().__init__(evt_kin, seed)
+        self.done = done
+
+    def __call__(self, nevents):
+        if nevents == 1:
+            os._exit(1)
+        yield from super().__call__(1)
+        time.sleep(30)
+        self.done.touch()
+
+
+def test_generate_fork_worker_crash(tmp_path):
+    kin = CenterOfMass(100 * GeV, "p", "p")
+    done = tmp_path / "done"
+    with pytest.raises(RuntimeError, match="worker 1 terminated unexpectedly"):
+        list(parallel.generate(FakeModelCrash, kin, 3, workers=2, fork=True, done=done))
+    # the crash is detected without waiting for the other worker
+    assert not done.exists()
+
+
+@pytest.mark.parametrize("ordered", (True, False))
+def test_generate(ordered):
+    kin = CenterOfMass(100 * GeV, "p", "p")
+    events = list(
+        parallel.generate(Sibyll23d, kin, 10, workers=2, seed=1, ordered=ordered)
+    )
+    assert len(events) == 10
+    for event in events:
+        assert type(event) is EventData
+        assert event.kin == kin
+
+
+def test_generate_reproducible():
+    kin = CenterOfMass(100 * GeV, "p", "p")
+    a = list(parallel.generate(Sibyll23d, kin, 6, workers=3, seed=1))
+    b = list(parallel.generate(Sibyll23d, kin, 6, workers=3, seed=1))
+    assert all(ai == bi for (ai, bi) in zip(a, b))
+    # workers must not produce identical streams
+    assert not np.array_equal(a[0].pid, a[1].pid) or not np.array_equal(
+        a[0].px, a[1].px
+    )
+
+
+def test_generate_worker_error():
+    # Sibyll does not support lead targets, this fails in the worker
+    kin = CenterOfMass(100 * GeV, "p", "Pb")
+    with pytest.raises(RuntimeError, match="worker 0 failed"):
+        list(parallel.generate(Sibyll23d, kin, 2, workers=1))
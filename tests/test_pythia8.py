@@ -1,5 +1,6 @@
 from chromo.kinematics import CenterOfMass
 from chromo.models import Pythia8
+from chromo.models.pythia8 import _load_sigfit, _store_sigfit
 from chromo.constants import GeV, long_lived
 import numpy as np
 from numpy.testing import assert_allclose, assert_equal
@@ -7,6 +8,7 @@ from .util import reference_charge
 import pytest
 from functools import lru_cache
 import sys
+from types import SimpleNamespace
 
 
 pytestmark = pytest.mark.skipif(
@@ -28,6 +30,52 @@ def run_cross_section(energy, p1, p2):
     return m.cross_section()
 
 
+def run_variable_energy():
+    m = Pythia8(CenterOfMass(100 * GeV, "p", "p"), seed=1, variable_energy=True)
+    result = []
+    for kin in (
+        CenterOfMass(50 * GeV, "p", "p"),
+        CenterOfMass(50 * GeV, "pi+", "p"),
+        CenterOfMass(200 * GeV, "p", "p"),
+    ):
+        m.kinematics = kin
+        event = next(m(1))
+        result.append((m.cross_section(), event.kin, m._variable_setup))
+    return result
+
+
+def test_variable_energy():
+    (cs1, kin1, setup1), (cs2, kin2, setup2), (cs3, _, setup3) = run_variable_energy()
+    assert kin1 == CenterOfMass(50 * GeV, "p", "p")
+    assert kin2 == CenterOfMass(50 * GeV, "pi+", "p")
+    # no initialization for switching energy and projectile
+    assert setup1 == setup2 == (2212, 100 * GeV)
+    # higher energy requires initialization
+    assert setup3 == (2212, 200 * GeV)
+
+    ref = run_cross_section(50 * GeV, "p", "p")
+    assert_allclose(cs1.inelastic, ref.inelastic, rtol=1e-3)
+    assert cs2.inelastic < cs1.inelastic
+    assert cs3.inelastic > cs1.inelastic
+
+
+def test_sigfit_cache(tmp_path):
+    path = tmp_path / "sigfit.json"
+    assert _load_sigfit(path) == {}
+    _store_sigfit(path, "a", [1.0, 2.0])
+    _store_sigfit(path, "b", [3.0])
+    assert _load_sigfit(path) == {"a": [1.0, 2.0], "b": [3.0]}
+
+    m = SimpleNamespace(_config=["SoftQCD:inelastic = on"])
+    key = Pythia8._sigfit_key(m, CenterOfMass(100 * GeV, "p", "O"))
+    assert key == "2212,1000080160,20"
+    assert key == Pythia8._sigfit_key(m, CenterOfMass(110 * GeV, "p", "O"))
+    assert key != Pythia8._sigfit_key(m, CenterOfMass(200 * GeV, "p", "O"))
+    # user configuration of the fit disables the cache
+    m._config.append("HeavyIon:SigFitNGen = 10")
+    assert Pythia8._sigfit_key(m, CenterOfMass(100 * GeV, "p", "O")) is None
+
+
 @pytest.fixture
 @lru_cache(maxsize=1)  # Pythia8 initialization is very slow
 def event():
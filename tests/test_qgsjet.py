@@ -1,4 +1,4 @@
-from chromo.kinematics import CenterOfMass
+from chromo.kinematics import CenterOfMass, FixedTarget
 from chromo.models import QGSJet01d, QGSJetII03, QGSJetII04
 from chromo.constants import GeV
 from chromo.common import CrossSectionData
@@ -118,6 +118,24 @@ def test_cross_section(Model, reference_cross_section):
     assert c.__eq__(reference_cross_section, rtol=1e-3)
 
 
+def run_tabulated_cross_section(Model):
+    evt_kin = CenterOfMass(1e3 * GeV, "p", "N")
+    m = Model(evt_kin, seed=1)
+    elab = np.geomspace(1e2, 1e11, 7)
+    scalar = []
+    for e in elab:
+        m.kinematics = FixedTarget(e, "p", "N")
+        scalar.append(m.cross_section().prod)
+    return scalar, m._tabulated_cross_section(elab=elab).prod
+
+
+@pytest.mark.parametrize("Model", [QGSJet01d, QGSJetII03, QGSJetII04])
+def test_tabulated_cross_section(Model):
+    scalar, vector = run_in_separate_process(run_tabulated_cross_section, Model)
+    assert_allclose(vector, scalar)
+    assert np.all(np.diff(vector) > 0)
+
+
 def test_charge(event):
     expected = reference_charge(event.pid)
     ma = np.isnan(expected)
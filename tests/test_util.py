@@ -19,6 +19,23 @@ def test_select_mothers():
     assert_equal(par, [[-1, -1], [0, -1]])
 
 
+def test_select_mothers_vectorized():
+    rng = np.random.default_rng(1)
+    for _ in range(100):
+        n = rng.integers(2, 30)
+        mothers = rng.integers(-1, n, size=(n, 2)).astype(np.int32)
+        mask = rng.random(n) < 0.5
+        assert_equal(
+            util._select_mothers_numpy(mask, mothers),
+            util._select_mothers_loop(mask, mothers),
+        )
+    # integer indices and boolean masks give the same result
+    assert_equal(
+        util.select_mothers([0, 1, 3], mothers),
+        util.select_mothers(np.isin(np.arange(n), [0, 1, 3]), mothers),
+    )
+
+
 def test_tolerant_string_match():
     assert util.tolerant_string_match("123", "abc1 s2.d34")
     assert not util.tolerant_string_match("123", "321")
@@ -98,3 +115,12 @@ def test_is_real_nucleus():
     mix = util.CompositeTarget([("p", 0.5), ("He", 0.5)])
 
     assert util.is_real_nucleus(mix)
+
+
+def test_pdg2charge():
+    pids = [211, -211, 2212, -2212, 22, 2203, 3, 100443, 9000211, -1000020040, 0]
+    expected = [1, -1, 1, -1, 0, 4 / 3, -1 / 3, 0, 1, -2, np.nan]
+    assert_equal(util.pdg2charge(pids), expected)
+    assert util.pdg2charge(211) == 1
+    assert util.pdg2charge(1000260560) == 26
+    assert np.isnan(util.pdg2charge(12345678))